@@ -0,0 +1,173 @@
+`include "sys_types.svh"
+
+// ======================================================================================================
+// DENSE LAYER COMPUTE SIMULATION HARNESS
+// ======================================================================================================
+// Simulation-only wrapper around dense_layer_compute that models its tensor RAM, weight ROM and bias ROM
+// in HDL. The cocotb testbench writes each memory image as a hex file and pulses load_mem, after which
+// every memory read the DUT issues is served inside the simulator instead of by a Python responder
+// waking up on each clock edge.
+//
+// MEMORY MODEL:
+// - Reads are registered on the read enable, giving the one cycle of latency dense_layer_compute expects
+//   (addresses are issued in LOAD_DATA/LOAD_BIAS and the data is consumed on the following cycle)
+// - load_mem reloads all three memories from their files with $readmemh; entries past the end of a file
+//   keep their previous contents
+// - File formats: one value per line, two hex digits for tensor/weight bytes, eight for 32-bit biases,
+//   all in two's complement
+// - A +mem_prefix=<prefix> plusarg is prepended to every file name (set by make parallel so concurrent
+//   runs in the same directory use their own files)
+//
+// ADDRESS TRACE:
+// - Every cycle a memory read enable is high, a line "<t|w|b> <addr>" is appended to ADDR_TRACE_FILE
+//   (t = tensor RAM, w = weight ROM, b = bias ROM). load_mem restarts the file, so it holds the accesses
+//   of the current computation only
+//
+// OUTPUT CAPTURE:
+// - Every output_ready pulse stores output_data into its channel's 32-bit slice of output_vector
+//   (channel c occupies bits [c*32 +: 32]), so the testbench can read all results in a single access
+//   once computation_complete is set. Cleared on reset
+//
+// WAVEFORMS:
+// - When built with WAVES defined (make WAVES=1, the default) the DUT hierarchy, including the MAC
+//   datapath, is dumped to <mem_prefix>dense_layer_compute.vcd for post-mortem debugging
+//
+// CLOCKING:
+// - By default clk is an input driven by the testbench. Building with +define+HDL_CLOCK (make HDL_CLOCK=1)
+//   turns clk into an output toggled here every 5ns, so no Python clock coroutine has to run
+// ======================================================================================================
+
+module dense_layer_compute_tb #(
+    parameter string TENSOR_RAM_FILE = "dense_tensor_ram.hex",
+    parameter string WEIGHT_ROM_FILE = "dense_weight_rom.hex",
+    parameter string BIAS_ROM_FILE   = "dense_bias_rom.hex",
+    parameter string ADDR_TRACE_FILE = "dense_addr_trace.log"
+) (
+`ifdef HDL_CLOCK
+    output logic clk,
+`else
+    input logic clk,
+`endif
+    input logic reset,
+
+    // Pulse for one cycle after rewriting the memory image files
+    input logic load_mem,
+
+    // Control signals
+    input logic start_compute,
+    input logic input_valid,
+
+    // Runtime configuration inputs
+    input logic [$clog2(256+1)-1:0] input_size,
+    input logic [$clog2(64+1)-1:0] output_size,
+
+    // DUT outputs
+    output logic [31:0] output_data,
+    output logic [$clog2(64)-1:0] output_channel,
+    output logic [$clog2(64)-1:0] output_addr,
+    output logic output_ready,
+    output logic computation_complete,
+
+    // Captured results, one 32-bit slice per output channel
+    output logic [64*32-1:0] output_vector
+);
+
+`ifdef HDL_CLOCK
+    // 10ns period clock, matching the Clock the testbench would otherwise start
+    initial clk = 1'b0;
+    always #5ns clk = ~clk;
+`endif
+
+    // Memory interfaces between the DUT and the memory models
+    logic [$clog2(256)-1:0] tensor_ram_addr;
+    logic tensor_ram_re;
+    logic [7:0] tensor_ram_dout;
+
+    logic [$clog2(256*64)-1:0] weight_rom_addr;
+    logic weight_rom_re;
+    logic [7:0] weight_rom_dout;
+
+    logic [$clog2(64)-1:0] bias_rom_addr;
+    logic bias_rom_re;
+    logic [31:0] bias_rom_dout;
+
+    // Memory models
+    logic [7:0] tensor_ram [0:255];
+    logic [7:0] weight_rom [0:256*64-1];
+    logic [31:0] bias_rom [0:63];
+
+    string mem_prefix = "";
+    initial begin
+        void'($value$plusargs("mem_prefix=%s", mem_prefix));
+`ifdef WAVES
+        $dumpfile({mem_prefix, "dense_layer_compute.vcd"});
+        $dumpvars(0, dut);
+`endif
+    end
+
+    always @(posedge clk) begin
+        if (load_mem) begin
+            $readmemh({mem_prefix, TENSOR_RAM_FILE}, tensor_ram);
+            $readmemh({mem_prefix, WEIGHT_ROM_FILE}, weight_rom);
+            $readmemh({mem_prefix, BIAS_ROM_FILE}, bias_rom);
+        end
+    end
+
+    integer addr_trace_fd = 0;
+
+    always @(posedge clk) begin
+        if (load_mem) begin
+            if (addr_trace_fd != 0) $fclose(addr_trace_fd);
+            addr_trace_fd = $fopen({mem_prefix, ADDR_TRACE_FILE}, "w");
+        end else if (!reset && addr_trace_fd != 0) begin
+            if (tensor_ram_re) $fwrite(addr_trace_fd, "t %0d\n", tensor_ram_addr);
+            if (weight_rom_re) $fwrite(addr_trace_fd, "w %0d\n", weight_rom_addr);
+            if (bias_rom_re) $fwrite(addr_trace_fd, "b %0d\n", bias_rom_addr);
+            $fflush(addr_trace_fd);
+        end
+    end
+
+    always_ff @(posedge clk) begin
+        if (reset) begin
+            tensor_ram_dout <= '0;
+            weight_rom_dout <= '0;
+            bias_rom_dout <= '0;
+        end else begin
+            if (tensor_ram_re) tensor_ram_dout <= tensor_ram[tensor_ram_addr];
+            if (weight_rom_re) weight_rom_dout <= weight_rom[weight_rom_addr];
+            if (bias_rom_re) bias_rom_dout <= bias_rom[bias_rom_addr];
+        end
+    end
+
+    always_ff @(posedge clk) begin
+        if (reset) begin
+            output_vector <= '0;
+        end else if (output_ready) begin
+            output_vector[output_channel*32 +: 32] <= output_data;
+        end
+    end
+
+    dense_layer_compute dut (
+        .clk(clk),
+        .reset(reset),
+        .start_compute(start_compute),
+        .input_valid(input_valid),
+        .input_size(input_size),
+        .output_size(output_size),
+        .tensor_ram_addr(tensor_ram_addr),
+        .tensor_ram_re(tensor_ram_re),
+        .tensor_ram_dout(tensor_ram_dout),
+        .weight_rom_addr(weight_rom_addr),
+        .weight_rom_re(weight_rom_re),
+        .weight_rom_dout(weight_rom_dout),
+        .bias_rom_addr(bias_rom_addr),
+        .bias_rom_re(bias_rom_re),
+        .bias_rom_dout(bias_rom_dout),
+        .output_data(output_data),
+        .output_channel(output_channel),
+        .output_addr(output_addr),
+        .output_ready(output_ready),
+        .computation_complete(computation_complete)
+    );
+
+endmodule
@@ -0,0 +1,78 @@
+`include "sys_types.svh"
+
+// ======================================================================================================
+// MAXPOOL UNIT SIMULATION HARNESS
+// ======================================================================================================
+// Simulation-only wrapper around maxpool_unit that exposes the per-lane input arrays as packed buses,
+// so the cocotb testbench can drive every lane of a row with one write per port instead of one write
+// per lane and port.
+//
+// PACKED INPUTS:
+// - Lane ch occupies bit ch of in_valid and bits [ch*W +: W] of the *_flat buses, where W is N_BITS
+//   for in_row_flat/in_col_flat and 8 for in_data_flat (two's complement)
+// - Parameters, pos_row/pos_col and all outputs are passed through unchanged
+// ======================================================================================================
+
+module maxpool_unit_tb #(
+  parameter  int SA_N          = 4
+  ,parameter int MAX_N         = 64
+  ,parameter int N_BITS        = $clog2(MAX_N)
+  ,parameter int FILTER_H      = 2
+  ,parameter int FILTER_W      = 2
+) (
+  input  logic                     clk
+  ,input  logic                     reset
+
+  ,input  logic [N_BITS-1:0]        pos_row
+  ,input  logic [N_BITS-1:0]        pos_col
+
+  // Packed per-lane inputs, lane 0 in the least significant bits
+  ,input  logic [SA_N-1:0]          in_valid
+  ,input  logic [SA_N*N_BITS-1:0]   in_row_flat
+  ,input  logic [SA_N*N_BITS-1:0]   in_col_flat
+  ,input  logic [SA_N*8-1:0]        in_data_flat
+
+  ,output logic                     idle
+  ,output logic                     out_valid
+  ,output logic [N_BITS-1:0]        out_row
+  ,output logic [N_BITS-1:0]        out_col
+  ,output int8_t                    out_data
+);
+
+  logic              lane_valid [SA_N];
+  logic [N_BITS-1:0] lane_row   [SA_N];
+  logic [N_BITS-1:0] lane_col   [SA_N];
+  int8_t             lane_data  [SA_N];
+
+  always_comb begin
+    for (int ch = 0; ch < SA_N; ch++) begin
+      lane_valid[ch] = in_valid[ch];
+      lane_row[ch]   = in_row_flat[ch*N_BITS +: N_BITS];
+      lane_col[ch]   = in_col_flat[ch*N_BITS +: N_BITS];
+      lane_data[ch]  = int8_t'(in_data_flat[ch*8 +: 8]);
+    end
+  end
+
+  maxpool_unit #(
+    .SA_N(SA_N)
+    ,.MAX_N(MAX_N)
+    ,.N_BITS(N_BITS)
+    ,.FILTER_H(FILTER_H)
+    ,.FILTER_W(FILTER_W)
+  ) dut (
+    .clk(clk)
+    ,.reset(reset)
+    ,.pos_row(pos_row)
+    ,.pos_col(pos_col)
+    ,.in_valid(lane_valid)
+    ,.in_row(lane_row)
+    ,.in_col(lane_col)
+    ,.in_data(lane_data)
+    ,.idle(idle)
+    ,.out_valid(out_valid)
+    ,.out_row(out_row)
+    ,.out_col(out_col)
+    ,.out_data(out_data)
+  );
+
+endmodule
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""List the tests a cocotb testbench module registers, one name per line, for "make parallel" to fan out"""
+
+import ast
+import sys
+
+def is_cocotb_test(decorator):
+    """True for a @cocotb.test or @cocotb.test(...) decorator"""
+    if isinstance(decorator, ast.Call):
+        decorator = decorator.func
+    return (isinstance(decorator, ast.Attribute) and decorator.attr == 'test'
+            and isinstance(decorator.value, ast.Name) and decorator.value.id == 'cocotb')
+
+def option_length(node, constants):
+    """Number of values in a TestFactory.add_option() list, tuple or range() literal; range bounds may name module constants"""
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return len(node.elts)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'range':
+        bounds = [constants[arg.id] if isinstance(arg, ast.Name) else ast.literal_eval(arg) for arg in node.args]
+        return len(range(*bounds))
+    raise ValueError(f"can't count the values of TestFactory option {ast.dump(node)}")
+
+def list_testcases(path):
+    """Return the names of the tests cocotb registers for path, expanding each TestFactory into its base_NNN tests"""
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    
+    tests = []
+    factory_bases = set()
+    factories = {}
+    constants = {}
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if any(is_cocotb_test(d) for d in node.decorator_list):
+                tests.append(node.name)
+        elif isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant):
+            # NUM_TESTS = 10: module constants that factory option ranges may refer to
+            constants[node.targets[0].id] = node.value.value
+        elif isinstance(node, ast.Assign) and isinstance(node.value, ast.Call):
+            # factory = TestFactory(base): cocotb only registers the generated base_NNN tests
+            call = node.value
+            if isinstance(call.func, ast.Name) and call.func.id == 'TestFactory' and call.args:
+                factory_bases.add(call.args[0].id)
+                factories[node.targets[0].id] = (call.args[0].id, [])
+        elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+            # factory.add_option(name, values) / factory.generate_tests(prefix=..., postfix=...)
+            call = node.value
+            if not (isinstance(call.func, ast.Attribute) and isinstance(call.func.value, ast.Name)
+                    and call.func.value.id in factories):
+                continue
+            base, lengths = factories[call.func.value.id]
+            if call.func.attr == 'add_option':
+                lengths.append(option_length(call.args[1], constants))
+            elif call.func.attr == 'generate_tests':
+                kwargs = {kw.arg: ast.literal_eval(kw.value) for kw in call.keywords}
+                count = 1
+                for length in lengths:
+                    count *= length
+                tests.extend(f"{kwargs.get('prefix', '')}{base}{kwargs.get('postfix', '')}_{i:03d}"
+                             for i in range(1, count + 1))
+    
+    return [name for name in tests if name not in factory_bases]
+
+if __name__ == "__main__":
+    print("\n".join(list_testcases(sys.argv[1])))
@@ -0,0 +1,50 @@
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge
+import numpy as np
+
+async def init_dut(dut, img_w=16, img_h=16, channels=8, clock_period_ns=10):
+    """Start the clock, reset the DUT and configure an unpadded img_h x img_w x channels image; returns the clock edge trigger"""
+    
+    # Start clock
+    cocotb.start_soon(Clock(dut.clk, clock_period_ns, units="ns").start())
+    clk_edge = RisingEdge(dut.clk)
+    
+    # Reset
+    dut.reset.value = 1
+    await clk_edge
+    await clk_edge
+    dut.reset.value = 0
+    await clk_edge
+    
+    # Configure image dimensions
+    dut.img_width.value = img_w
+    dut.img_height.value = img_h
+    dut.num_channels.value = channels
+    dut.pad_top.value = 0
+    dut.pad_bottom.value = 0
+    dut.pad_left.value = 0
+    dut.pad_right.value = 0
+    
+    # Initialize control signals
+    dut.start_extraction.value = 0
+    dut.next_channel_group.value = 0
+    dut.next_spatial_block.value = 0
+    dut.start_formatting.value = 0
+    dut.tensor_ram_we.value = 0
+    
+    await clk_edge
+    return clk_edge
+
+def pad_to(array, shape, dtype):
+    """Zero-extend array to the full port shape so a smaller layer lands in the leading rows/columns"""
+    padded = np.zeros(shape, dtype=dtype)
+    padded[tuple(slice(0, n) for n in array.shape)] = array
+    return padded
+
+def load_operands(dut, input_vector, weight_matrix, bias_vector):
+    """Drive the operand ports with one list assignment per port (tolist() yields Python ints)"""
+    max_in, max_out = len(dut.input_vector), len(dut.bias_vector)
+    dut.input_vector.value = pad_to(input_vector, (max_in,), np.int8).tolist()
+    dut.weight_matrix.value = pad_to(weight_matrix, (max_in, max_out), np.int8).tolist()
+    dut.bias_vector.value = pad_to(bias_vector, (max_out,), np.int32).tolist()
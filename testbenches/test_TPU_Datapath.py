@@ -1,6 +1,5 @@
-import cocotb, logging
-cocotb.log.setLevel(logging.DEBUG)
-from cocotb.triggers import RisingEdge
+import cocotb
+from cocotb.triggers import RisingEdge, ClockCycles
 from cocotb.clock import Clock
 import random
 
@@ -149,8 +148,7 @@ async def test_TPU_Datapath(dut):
     async def read_logits():
         # dut._log.info("Starting logits read")
         dut.read_logits.value = 1
-        for _ in range(10): # Wait for logits to be loaded
-            await tick()
+        await ClockCycles(dut.clk, 10) # Wait for logits to be loaded
         dut.read_logits.value = 0
         await tick()
     
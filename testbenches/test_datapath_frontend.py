@@ -1,5 +1,4 @@
-import cocotb, logging
-cocotb.log.setLevel(logging.DEBUG)
+import cocotb
 from cocotb.triggers import RisingEdge
 from cocotb.clock import Clock
 import random
@@ -8,7 +7,6 @@ import random
 @cocotb.test()
 async def test_datapath_frontend(dut):
     CLOCK_PERIOD = 2
-    dut._log.setLevel(logging.DEBUG)
     # Start clock
     cocotb.start_soon(Clock(dut.clk, CLOCK_PERIOD, units="ns").start())
 
@@ -2,34 +2,62 @@ import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, Timer
 import numpy as np
+import functools
 import os
 
+# Per-cycle trace output for the small debug tests; enable with COCOTB_DENSE_VERBOSE=1
+VERBOSE = os.environ.get("COCOTB_DENSE_VERBOSE", "0") == "1"
+
+# current_state decode for the debug trace (dense_state_t in rtl/dense_layer_compute.sv)
+STATE_NAMES = dict(enumerate(('IDLE', 'LOAD_BIAS', 'LOAD_DATA', 'COMPUTE_MAC', 'OUTPUT_READY', 'COMPLETE')))
+
+# Monitor-loop cycle budget per (input_size, output_size) layer shape
+MAX_CYCLES = {(2, 1): 50, (3, 2): 100, (64, 10): 5000, (256, 64): 20000}
+
+# The dense layer has no timing constraint in simulation, so run the clock as fast as possible
+CLK_PERIOD_NS = 2
+
+# Address ranges of dense_layer_compute's memory ports (256 inputs, 64 outputs at most)
+TENSOR_RAM_DEPTH = 256
+WEIGHT_ROM_DEPTH = 256 * 64
+BIAS_ROM_DEPTH = 64
+
+async def bring_up(dut):
+    """Start the clock, zero the control and memory inputs, and reset the DUT."""
+    cocotb.start_soon(Clock(dut.clk, CLK_PERIOD_NS, units="ns").start())
+    dut.reset.value = 1
+    for sig in ("start_compute", "input_valid", "input_size", "output_size",
+                "tensor_ram_dout", "weight_rom_dout", "bias_rom_dout"):
+        getattr(dut, sig).value = 0
+    await RisingEdge(dut.clk)
+    await RisingEdge(dut.clk)
+    dut.reset.value = 0
+    await RisingEdge(dut.clk)
+
+def rom_image(values, depth):
+    """Zero-pad a memory image to the full address range of its port"""
+    return values + [0] * (depth - len(values))
+
+@functools.lru_cache(maxsize=None)
+def make_dense_case(input_size, output_size, seed=0):
+    """Seeded (input_vector, weight_matrix, bias_vector, expected_outputs) for an input_size → output_size layer, generated once per shape"""
+    rng = np.random.default_rng(seed)
+    input_vector = rng.integers(-128, 127, input_size, dtype=np.int8)
+    weight_matrix = rng.integers(-128, 127, (input_size, output_size), dtype=np.int8)
+    bias_vector = rng.integers(-1000, 1000, output_size, dtype=np.int32)
+    expected_outputs = input_vector.astype(np.int32) @ weight_matrix.astype(np.int32) + bias_vector
+    # Cached arrays are shared between tests, so keep them read-only
+    for arr in (input_vector, weight_matrix, bias_vector, expected_outputs):
+        arr.setflags(write=False)
+    return input_vector, weight_matrix, bias_vector, expected_outputs
+
 @cocotb.test()
 async def test_simple_2_to_1(dut):
     """Simple test: 2 inputs → 1 output to debug basic operation"""
     
     cocotb.log.info("Testing simple 2→1 dense layer for debugging")
     
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
-    
-    # Reset
-    dut.reset.value = 1
-    dut.start_compute.value = 0
-    dut.input_valid.value = 0
-    dut.input_size.value = 0
-    dut.output_size.value = 0
-    
-    # Initialize memory interfaces
-    dut.tensor_ram_dout.value = 0
-    dut.weight_rom_dout.value = 0
-    dut.bias_rom_dout.value = 0
-    
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
+    await bring_up(dut)
     
     # Simple test: 2 inputs, 1 output
     # Input: [3, 4], Weight: [2, 1], Bias: 5
@@ -37,14 +65,16 @@ async def test_simple_2_to_1(dut):
     input_size = 2
     output_size = 1
     
-    input_vector = np.array([3, 4], dtype=np.int8)
-    weight_matrix = np.array([[2], [1]], dtype=np.int8)  # 2x1 matrix
-    bias_vector = np.array([5], dtype=np.int32)
+    # Operands are fixed, so keep them as plain Python ints and constant lengths for the responders
+    IV = [3, 4]
+    WF = [2, 1]  # 2x1 weight matrix, row-major so the ROM address indexes it directly
+    BV = [5]
+    IV_N, WF_N, BV_N = len(IV), len(WF), len(BV)
     
     print(f"=== Simple Test: {input_size} → {output_size} ===")
-    print(f"Input: {input_vector}")
-    print(f"Weight: {weight_matrix.flatten()}")
-    print(f"Bias: {bias_vector}")
+    print(f"Input: {IV}")
+    print(f"Weight: {WF}")
+    print(f"Bias: {BV}")
     print(f"Expected: 3*2 + 4*1 + 5 = {3*2 + 4*1 + 5}")
     
     dut.input_size.value = input_size
@@ -57,64 +87,69 @@ async def test_simple_2_to_1(dut):
     
     # Monitor computation with detailed logging
     cycle_count = 0
-    max_cycles = 50
+    max_cycles = MAX_CYCLES[(input_size, output_size)]
+    
+    # Resolve optional debug signals once; None when the DUT doesn't expose them
+    state_h = getattr(dut, 'current_state', None)
+    input_idx_h = getattr(dut, 'input_idx', None)
+    output_idx_h = getattr(dut, 'output_idx', None)
+    bias_idx_h = getattr(dut, 'bias_idx', None)
+    acc_h = getattr(dut, 'output_accumulator', None)
+    
+    # Memory port handles used by the responder every cycle
+    tram_re, tram_addr, tram_dout = dut.tensor_ram_re, dut.tensor_ram_addr, dut.tensor_ram_dout
+    wrom_re, wrom_addr, wrom_dout = dut.weight_rom_re, dut.weight_rom_addr, dut.weight_rom_dout
+    brom_re, brom_addr, brom_dout = dut.bias_rom_re, dut.bias_rom_addr, dut.bias_rom_dout
     
     while cycle_count < max_cycles:
         await RisingEdge(dut.clk)
         cycle_count += 1
         
-        # Get current state for debugging
-        current_state = int(dut.current_state.value) if hasattr(dut, 'current_state') else -1
-        state_names = ["IDLE", "LOAD_BIAS", "COMPUTE_MAC", "COMPLETE"]
-        state_name = state_names[current_state] if 0 <= current_state < len(state_names) else f"UNKNOWN({current_state})"
-        
-        # Get indices
-        input_idx = int(dut.input_idx.value) if hasattr(dut, 'input_idx') else -1
-        output_idx = int(dut.output_idx.value) if hasattr(dut, 'output_idx') else -1
-        bias_idx = int(dut.bias_idx.value) if hasattr(dut, 'bias_idx') else -1
-        
-        # Get accumulator
-        acc_0 = int(dut.output_accumulator[0].value) if hasattr(dut, 'output_accumulator') else -1
-        
-        print(f"Cycle {cycle_count:2d}: State={state_name:12s} in_idx={input_idx} out_idx={output_idx} bias_idx={bias_idx} acc[0]={acc_0}")
+        if VERBOSE:
+            # Get current state for debugging
+            current_state = int(state_h.value) if state_h is not None else -1
+            state_name = STATE_NAMES.get(current_state, str(current_state))
+            
+            # Get indices
+            input_idx = int(input_idx_h.value) if input_idx_h is not None else -1
+            output_idx = int(output_idx_h.value) if output_idx_h is not None else -1
+            bias_idx = int(bias_idx_h.value) if bias_idx_h is not None else -1
+            
+            # Get accumulator
+            acc_0 = int(acc_h[0].value) if acc_h is not None else -1
+            
+            print(f"Cycle {cycle_count:2d}: State={state_name:12s} in_idx={input_idx} out_idx={output_idx} bias_idx={bias_idx} acc[0]={acc_0}")
         
         # Respond to memory requests
-        if int(dut.tensor_ram_re.value) == 1:
-            addr = int(dut.tensor_ram_addr.value)
-            if addr < len(input_vector):
-                dut.tensor_ram_dout.value = int(input_vector[addr])
-                print(f"          -> tensor_ram[{addr}] = {int(input_vector[addr])}")
+        if int(tram_re.value) == 1:
+            addr = int(tram_addr.value)
+            if addr < IV_N:
+                tram_dout.value = IV[addr]
+                if VERBOSE:
+                    print(f"          -> tensor_ram[{addr}] = {IV[addr]}")
                 
-        if int(dut.weight_rom_re.value) == 1:
-            addr = int(dut.weight_rom_addr.value)
-            if addr < weight_matrix.size:
-                input_idx_calc = addr // output_size
-                output_idx_calc = addr % output_size
-                if input_idx_calc < weight_matrix.shape[0] and output_idx_calc < weight_matrix.shape[1]:
-                    weight_val = int(weight_matrix[input_idx_calc, output_idx_calc])
-                    dut.weight_rom_dout.value = weight_val
-                    print(f"          -> weight_rom[{addr}] = {weight_val} (in={input_idx_calc}, out={output_idx_calc})")
-                else:
-                    dut.weight_rom_dout.value = 0
-            else:
-                dut.weight_rom_dout.value = 0
+        if int(wrom_re.value) == 1:
+            addr = int(wrom_addr.value)
+            weight_val = WF[addr] if addr < WF_N else 0
+            wrom_dout.value = weight_val
+            if VERBOSE:
+                print(f"          -> weight_rom[{addr}] = {weight_val} (in, out)={divmod(addr, output_size)}")
                 
-        if int(dut.bias_rom_re.value) == 1:
-            addr = int(dut.bias_rom_addr.value)
-            if addr < len(bias_vector):
-                bias_val = int(bias_vector[addr])
-                dut.bias_rom_dout.value = bias_val
-                print(f"          -> bias_rom[{addr}] = {bias_val}")
+        if int(brom_re.value) == 1:
+            addr = int(brom_addr.value)
+            if addr < BV_N:
+                bias_val = BV[addr]
+                brom_dout.value = bias_val
+                if VERBOSE:
+                    print(f"          -> bias_rom[{addr}] = {bias_val}")
             else:
-                dut.bias_rom_dout.value = 0
+                brom_dout.value = 0
         
         # Check if computation is complete
         if int(dut.computation_complete.value) == 1:
-            print(f"Computation completed at cycle {cycle_count}")
+            cocotb.log.info(f"Computation completed at cycle {cycle_count}")
             final_output = int(dut.output_vector[0].value)
-            print(f"Final output: {final_output}")
-            print(f"Expected: 15")
-            print(f"Match: {final_output == 15}")
+            cocotb.log.info(f"Final output: {final_output}, expected: 15, match: {final_output == 15}")
             break
     
     if cycle_count >= max_cycles:
@@ -128,48 +163,22 @@ async def test_dense_layer_256_to_64(dut):
     
     cocotb.log.info("Testing dense layer with TPU model first dense layer size: 256→64")
     
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
-    
-    # Reset
-    dut.reset.value = 1
-    dut.start_compute.value = 0
-    dut.input_valid.value = 0
-    dut.input_size.value = 0
-    dut.output_size.value = 0
-    
-    # Initialize memory interfaces
-    dut.tensor_ram_dout.value = 0
-    dut.weight_rom_dout.value = 0
-    dut.bias_rom_dout.value = 0
-    
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
-    
     # TPU model first dense layer: 256 inputs, 64 outputs
     input_size = 256
     output_size = 64
     
-    # Create test data
-    input_vector = np.random.randint(-128, 127, size=input_size, dtype=np.int8)
-    weight_matrix = np.random.randint(-128, 127, size=(input_size, output_size), dtype=np.int8)
-    bias_vector = np.random.randint(-1000, 1000, size=output_size, dtype=np.int32)
+    await bring_up(dut)
     
-    # Calculate expected results
-    expected_outputs = []
-    for out_idx in range(output_size):
-        result = bias_vector[out_idx]
-        for in_idx in range(input_size):
-            result += int(input_vector[in_idx]) * int(weight_matrix[in_idx, out_idx])
-        expected_outputs.append(result)
+    # Create test data and the 256x64 reference (generated once per shape)
+    input_vector, weight_matrix, bias_vector, expected_outputs = make_dense_case(input_size, output_size)
     
     print(f"=== Testing Dense Layer: {input_size} → {output_size} ===")
-    print(f"Input range: [{np.min(input_vector)}, {np.max(input_vector)}]")
-    print(f"Weight range: [{np.min(weight_matrix)}, {np.max(weight_matrix)}]")
-    print(f"Bias range: [{np.min(bias_vector)}, {np.max(bias_vector)}]")
+    iv_lo, iv_hi = int(input_vector.min()), int(input_vector.max())
+    wm_lo, wm_hi = int(weight_matrix.min()), int(weight_matrix.max())
+    bv_lo, bv_hi = int(bias_vector.min()), int(bias_vector.max())
+    print(f"Input range: [{iv_lo}, {iv_hi}]")
+    print(f"Weight range: [{wm_lo}, {wm_hi}]")
+    print(f"Bias range: [{bv_lo}, {bv_hi}]")
     print(f"Expected output[0]: {expected_outputs[0]}")
     print(f"Expected output[63]: {expected_outputs[63]}")
     
@@ -183,66 +192,42 @@ async def test_dense_layer_256_to_64(dut):
     
     # Monitor computation
     cycle_count = 0
-    max_cycles = 20000  # Increased for larger computation
+    max_cycles = MAX_CYCLES[(input_size, output_size)]
+    
+    # Plain Python lists back the memory responders so each access skips NumPy scalar unboxing;
+    # padded to the full address range so every read is a bare list index
+    iv_rom = rom_image(input_vector.tolist(), TENSOR_RAM_DEPTH)
+    wf_rom = rom_image(weight_matrix.reshape(-1).tolist(), WEIGHT_ROM_DEPTH)  # row-major, so the ROM address indexes it directly
+    bv_rom = rom_image(bias_vector.tolist(), BIAS_ROM_DEPTH)
+    
+    # Memory port handles used by the responder every cycle
+    tram_re, tram_addr, tram_dout = dut.tensor_ram_re, dut.tensor_ram_addr, dut.tensor_ram_dout
+    wrom_re, wrom_addr, wrom_dout = dut.weight_rom_re, dut.weight_rom_addr, dut.weight_rom_dout
+    brom_re, brom_addr, brom_dout = dut.bias_rom_re, dut.bias_rom_addr, dut.bias_rom_dout
     
     while cycle_count < max_cycles:
         await RisingEdge(dut.clk)
         cycle_count += 1
         
         # Respond to memory requests
-        if int(dut.tensor_ram_re.value) == 1:
-            addr = int(dut.tensor_ram_addr.value)
-            if addr < len(input_vector):
-                dut.tensor_ram_dout.value = int(input_vector[addr])
+        if int(tram_re.value) == 1:
+            tram_dout.value = iv_rom[int(tram_addr.value)]
                 
-        if int(dut.weight_rom_re.value) == 1:
-            addr = int(dut.weight_rom_addr.value)
-            if addr < weight_matrix.size:
-                input_idx_calc = addr // output_size
-                output_idx_calc = addr % output_size
-                if input_idx_calc < weight_matrix.shape[0] and output_idx_calc < weight_matrix.shape[1]:
-                    weight_val = int(weight_matrix[input_idx_calc, output_idx_calc])
-                    dut.weight_rom_dout.value = weight_val
-                else:
-                    dut.weight_rom_dout.value = 0
-            else:
-                dut.weight_rom_dout.value = 0
+        if int(wrom_re.value) == 1:
+            wrom_dout.value = wf_rom[int(wrom_addr.value)]
                 
-        if int(dut.bias_rom_re.value) == 1:
-            addr = int(dut.bias_rom_addr.value)
-            if addr < len(bias_vector):
-                bias_val = int(bias_vector[addr])
-                dut.bias_rom_dout.value = bias_val
-            else:
-                dut.bias_rom_dout.value = 0
+        if int(brom_re.value) == 1:
+            brom_dout.value = bv_rom[int(brom_addr.value)]
         
         # Check if computation is complete
         if int(dut.computation_complete.value) == 1:
             print(f"Computation completed at cycle {cycle_count}")
             
-            # Check first few and last few outputs
-            for i in [0, 1, 2, 62, 63]:
-                actual_output = int(dut.output_vector[i].value)
-                expected_output = expected_outputs[i]
-                print(f"Output[{i:2d}]: actual={actual_output:8d}, expected={expected_output:8d}, match={actual_output == expected_output}")
-            
-            # Verify all outputs are computed (non-zero or matching expected)
-            computed_outputs = 0
-            for i in range(output_size):
-                if int(dut.output_vector[i].value) != 0 or expected_outputs[i] == 0:
-                    computed_outputs += 1
-            
-            print(f"Computed outputs: {computed_outputs}/{output_size}")
-            
-            # Check that unused outputs remain zero
-            unused_outputs_zero = True
-            for i in range(output_size, 64):
-                if int(dut.output_vector[i].value) != 0:
-                    unused_outputs_zero = False
-                    print(f"ERROR: Unused output[{i}] = {int(dut.output_vector[i].value)} (should be 0)")
-            
-            if unused_outputs_zero:
-                print("✓ All unused outputs correctly remain zero")
+            # Read every output once and fail immediately on any mismatch (assert_array_equal reports the diff)
+            hw_outputs = np.array([dut.output_vector[i].value.signed_integer for i in range(output_size)], dtype=np.int64)
+            np.testing.assert_array_equal(hw_outputs, np.asarray(expected_outputs[:output_size], dtype=np.int64),
+                                          err_msg=f"Dense {input_size}→{output_size} outputs mismatch")
+            print(f"✓ All {output_size} outputs match expected values")
             
             break
     
@@ -257,48 +242,22 @@ async def test_dense_layer_64_to_10(dut):
     
     cocotb.log.info("Testing dense layer with TPU model second dense layer size: 64→10")
     
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
-    
-    # Reset
-    dut.reset.value = 1
-    dut.start_compute.value = 0
-    dut.input_valid.value = 0
-    dut.input_size.value = 0
-    dut.output_size.value = 0
-    
-    # Initialize memory interfaces
-    dut.tensor_ram_dout.value = 0
-    dut.weight_rom_dout.value = 0
-    dut.bias_rom_dout.value = 0
-    
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
+    await bring_up(dut)
     
     # TPU model second dense layer: 64 inputs, 10 outputs
     input_size = 64
     output_size = 10
     
-    # Create test data
-    input_vector = np.random.randint(-128, 127, size=input_size, dtype=np.int8)
-    weight_matrix = np.random.randint(-128, 127, size=(input_size, output_size), dtype=np.int8)
-    bias_vector = np.random.randint(-1000, 1000, size=output_size, dtype=np.int32)
-    
-    # Calculate expected results
-    expected_outputs = []
-    for out_idx in range(output_size):
-        result = bias_vector[out_idx]
-        for in_idx in range(input_size):
-            result += int(input_vector[in_idx]) * int(weight_matrix[in_idx, out_idx])
-        expected_outputs.append(result)
+    # Create test data and expected results (seeded, cached per layer shape)
+    input_vector, weight_matrix, bias_vector, expected_outputs = make_dense_case(input_size, output_size)
     
     print(f"=== Testing Dense Layer: {input_size} → {output_size} ===")
-    print(f"Input range: [{np.min(input_vector)}, {np.max(input_vector)}]")
-    print(f"Weight range: [{np.min(weight_matrix)}, {np.max(weight_matrix)}]")
-    print(f"Bias range: [{np.min(bias_vector)}, {np.max(bias_vector)}]")
+    iv_lo, iv_hi = int(input_vector.min()), int(input_vector.max())
+    wm_lo, wm_hi = int(weight_matrix.min()), int(weight_matrix.max())
+    bv_lo, bv_hi = int(bias_vector.min()), int(bias_vector.max())
+    print(f"Input range: [{iv_lo}, {iv_hi}]")
+    print(f"Weight range: [{wm_lo}, {wm_hi}]")
+    print(f"Bias range: [{bv_lo}, {bv_hi}]")
     print(f"Expected outputs: {expected_outputs}")
     
     dut.input_size.value = input_size
@@ -311,38 +270,32 @@ async def test_dense_layer_64_to_10(dut):
     
     # Monitor computation
     cycle_count = 0
-    max_cycles = 5000  # Smaller computation
+    max_cycles = MAX_CYCLES[(input_size, output_size)]
+    
+    # Plain Python lists back the memory responders so each access skips NumPy scalar unboxing;
+    # padded to the full address range so every read is a bare list index
+    iv_rom = rom_image(input_vector.tolist(), TENSOR_RAM_DEPTH)
+    wf_rom = rom_image(weight_matrix.reshape(-1).tolist(), WEIGHT_ROM_DEPTH)  # row-major, so the ROM address indexes it directly
+    bv_rom = rom_image(bias_vector.tolist(), BIAS_ROM_DEPTH)
+    
+    # Memory port handles used by the responder every cycle
+    tram_re, tram_addr, tram_dout = dut.tensor_ram_re, dut.tensor_ram_addr, dut.tensor_ram_dout
+    wrom_re, wrom_addr, wrom_dout = dut.weight_rom_re, dut.weight_rom_addr, dut.weight_rom_dout
+    brom_re, brom_addr, brom_dout = dut.bias_rom_re, dut.bias_rom_addr, dut.bias_rom_dout
     
     while cycle_count < max_cycles:
         await RisingEdge(dut.clk)
         cycle_count += 1
         
         # Respond to memory requests
-        if int(dut.tensor_ram_re.value) == 1:
-            addr = int(dut.tensor_ram_addr.value)
-            if addr < len(input_vector):
-                dut.tensor_ram_dout.value = int(input_vector[addr])
+        if int(tram_re.value) == 1:
+            tram_dout.value = iv_rom[int(tram_addr.value)]
                 
-        if int(dut.weight_rom_re.value) == 1:
-            addr = int(dut.weight_rom_addr.value)
-            if addr < weight_matrix.size:
-                input_idx_calc = addr // output_size
-                output_idx_calc = addr % output_size
-                if input_idx_calc < weight_matrix.shape[0] and output_idx_calc < weight_matrix.shape[1]:
-                    weight_val = int(weight_matrix[input_idx_calc, output_idx_calc])
-                    dut.weight_rom_dout.value = weight_val
-                else:
-                    dut.weight_rom_dout.value = 0
-            else:
-                dut.weight_rom_dout.value = 0
+        if int(wrom_re.value) == 1:
+            wrom_dout.value = wf_rom[int(wrom_addr.value)]
                 
-        if int(dut.bias_rom_re.value) == 1:
-            addr = int(dut.bias_rom_addr.value)
-            if addr < len(bias_vector):
-                bias_val = int(bias_vector[addr])
-                dut.bias_rom_dout.value = bias_val
-            else:
-                dut.bias_rom_dout.value = 0
+        if int(brom_re.value) == 1:
+            brom_dout.value = bv_rom[int(brom_addr.value)]
         
         # Check if computation is complete
         if int(dut.computation_complete.value) == 1:
@@ -358,15 +311,13 @@ async def test_dense_layer_64_to_10(dut):
                     all_correct = False
                 print(f"Output[{i}]: actual={actual_output:8d}, expected={expected_output:8d}, {'✓' if is_correct else '✗'}")
             
-            # Check that unused outputs remain zero
-            unused_outputs_zero = True
-            for i in range(output_size, 64):
-                if int(dut.output_vector[i].value) != 0:
-                    unused_outputs_zero = False
-                    print(f"ERROR: Unused output[{i}] = {int(dut.output_vector[i].value)} (should be 0)")
-            
-            if unused_outputs_zero:
-                print("✓ All unused outputs correctly remain zero")
+            # Check that unused outputs remain zero, stopping at the first non-zero one
+            if output_size < 64:
+                first_nonzero = next((i for i in range(output_size, 64) if int(dut.output_vector[i].value) != 0), None)
+                if first_nonzero is None:
+                    print("✓ All unused outputs correctly remain zero")
+                else:
+                    print(f"ERROR: Unused output[{first_nonzero}] = {int(dut.output_vector[first_nonzero].value)} (should be 0)")
             
             if all_correct:
                 print("✓ All outputs match expected values")
@@ -386,26 +337,7 @@ async def test_3_to_2_debug(dut):
     
     cocotb.log.info("Testing 3→2 dense layer for debugging multiple outputs")
     
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
-    
-    # Reset
-    dut.reset.value = 1
-    dut.start_compute.value = 0
-    dut.input_valid.value = 0
-    dut.input_size.value = 0
-    dut.output_size.value = 0
-    
-    # Initialize memory interfaces
-    dut.tensor_ram_dout.value = 0
-    dut.weight_rom_dout.value = 0
-    dut.bias_rom_dout.value = 0
-    
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
+    await bring_up(dut)
     
     # Test: 3 inputs, 2 outputs
     # Input: [1, 2, 3]
@@ -419,14 +351,16 @@ async def test_3_to_2_debug(dut):
     input_size = 3
     output_size = 2
     
-    input_vector = np.array([1, 2, 3], dtype=np.int8)
-    weight_matrix = np.array([[10, 20], [30, 40], [50, 60]], dtype=np.int8)  # 3x2 matrix
-    bias_vector = np.array([100, 200], dtype=np.int32)
+    # Operands are fixed, so keep them as plain Python ints and constant lengths for the responders
+    IV = [1, 2, 3]
+    WF = [10, 20, 30, 40, 50, 60]  # 3x2 weight matrix, row-major so the ROM address indexes it directly
+    BV = [100, 200]
+    IV_N, WF_N, BV_N = len(IV), len(WF), len(BV)
     
     print(f"=== Test: {input_size} → {output_size} ===")
-    print(f"Input: {input_vector}")
-    print(f"Weight matrix:\n{weight_matrix}")
-    print(f"Bias: {bias_vector}")
+    print(f"Input: {IV}")
+    print(f"Weight matrix (row-major): {WF}")
+    print(f"Bias: {BV}")
     print(f"Expected output 0: 1*10 + 2*30 + 3*50 + 100 = {1*10 + 2*30 + 3*50 + 100}")
     print(f"Expected output 1: 1*20 + 2*40 + 3*60 + 200 = {1*20 + 2*40 + 3*60 + 200}")
     
@@ -440,68 +374,79 @@ async def test_3_to_2_debug(dut):
     
     # Monitor computation with detailed logging
     cycle_count = 0
-    max_cycles = 100
+    max_cycles = MAX_CYCLES[(input_size, output_size)]
+    
+    # Resolve optional debug signals once; None when the DUT doesn't expose them
+    state_h = getattr(dut, 'current_state', None)
+    input_idx_h = getattr(dut, 'input_idx', None)
+    output_idx_h = getattr(dut, 'output_idx', None)
+    bias_idx_h = getattr(dut, 'bias_idx', None)
+    acc_h = getattr(dut, 'output_accumulator', None)
+    
+    # Memory port handles used by the responder every cycle
+    tram_re, tram_addr, tram_dout = dut.tensor_ram_re, dut.tensor_ram_addr, dut.tensor_ram_dout
+    wrom_re, wrom_addr, wrom_dout = dut.weight_rom_re, dut.weight_rom_addr, dut.weight_rom_dout
+    brom_re, brom_addr, brom_dout = dut.bias_rom_re, dut.bias_rom_addr, dut.bias_rom_dout
     
     while cycle_count < max_cycles:
         await RisingEdge(dut.clk)
         cycle_count += 1
         
-        # Get current state for debugging
-        current_state = int(dut.current_state.value) if hasattr(dut, 'current_state') else -1
-        state_names = ["IDLE", "LOAD_BIAS", "COMPUTE_MAC", "COMPLETE"]
-        state_name = state_names[current_state] if 0 <= current_state < len(state_names) else f"UNKNOWN({current_state})"
-        
-        # Get indices
-        input_idx = int(dut.input_idx.value) if hasattr(dut, 'input_idx') else -1
-        output_idx = int(dut.output_idx.value) if hasattr(dut, 'output_idx') else -1
-        bias_idx = int(dut.bias_idx.value) if hasattr(dut, 'bias_idx') else -1
-        
-        # Get accumulators
-        acc_0 = int(dut.output_accumulator[0].value) if hasattr(dut, 'output_accumulator') else -1
-        acc_1 = int(dut.output_accumulator[1].value) if hasattr(dut, 'output_accumulator') else -1
-        
-        print(f"Cycle {cycle_count:2d}: State={state_name:12s} in_idx={input_idx} out_idx={output_idx} bias_idx={bias_idx} acc[0]={acc_0} acc[1]={acc_1}")
+        if VERBOSE:
+            # Get current state for debugging
+            current_state = int(state_h.value) if state_h is not None else -1
+            state_name = STATE_NAMES.get(current_state, str(current_state))
+            
+            # Get indices
+            input_idx = int(input_idx_h.value) if input_idx_h is not None else -1
+            output_idx = int(output_idx_h.value) if output_idx_h is not None else -1
+            bias_idx = int(bias_idx_h.value) if bias_idx_h is not None else -1
+            
+            # Get accumulators
+            acc_0 = int(acc_h[0].value) if acc_h is not None else -1
+            acc_1 = int(acc_h[1].value) if acc_h is not None else -1
+            
+            print(f"Cycle {cycle_count:2d}: State={state_name:12s} in_idx={input_idx} out_idx={output_idx} bias_idx={bias_idx} acc[0]={acc_0} acc[1]={acc_1}")
         
         # Respond to memory requests
-        if int(dut.tensor_ram_re.value) == 1:
-            addr = int(dut.tensor_ram_addr.value)
-            if addr < len(input_vector):
-                dut.tensor_ram_dout.value = int(input_vector[addr])
-                print(f"          -> tensor_ram[{addr}] = {int(input_vector[addr])}")
+        if int(tram_re.value) == 1:
+            addr = int(tram_addr.value)
+            if addr < IV_N:
+                tram_dout.value = IV[addr]
+                if VERBOSE:
+                    print(f"          -> tensor_ram[{addr}] = {IV[addr]}")
                 
-        if int(dut.weight_rom_re.value) == 1:
-            addr = int(dut.weight_rom_addr.value)
-            if addr < weight_matrix.size:
-                input_idx_calc = addr // output_size
-                output_idx_calc = addr % output_size
-                if input_idx_calc < weight_matrix.shape[0] and output_idx_calc < weight_matrix.shape[1]:
-                    weight_val = int(weight_matrix[input_idx_calc, output_idx_calc])
-                    dut.weight_rom_dout.value = weight_val
-                    print(f"          -> weight_rom[{addr}] = {weight_val} (in={input_idx_calc}, out={output_idx_calc})")
-                else:
-                    dut.weight_rom_dout.value = 0
-                    print(f"          -> weight_rom[{addr}] = 0 (out of bounds)")
+        if int(wrom_re.value) == 1:
+            addr = int(wrom_addr.value)
+            if addr < WF_N:
+                weight_val = WF[addr]
+                wrom_dout.value = weight_val
+                if VERBOSE:
+                    print(f"          -> weight_rom[{addr}] = {weight_val} (in, out)={divmod(addr, output_size)}")
             else:
-                dut.weight_rom_dout.value = 0
-                print(f"          -> weight_rom[{addr}] = 0 (addr out of bounds)")
+                wrom_dout.value = 0
+                if VERBOSE:
+                    print(f"          -> weight_rom[{addr}] = 0 (addr out of bounds)")
                 
-        if int(dut.bias_rom_re.value) == 1:
-            addr = int(dut.bias_rom_addr.value)
-            if addr < len(bias_vector):
-                bias_val = int(bias_vector[addr])
-                dut.bias_rom_dout.value = bias_val
-                print(f"          -> bias_rom[{addr}] = {bias_val}")
+        if int(brom_re.value) == 1:
+            addr = int(brom_addr.value)
+            if addr < BV_N:
+                bias_val = BV[addr]
+                brom_dout.value = bias_val
+                if VERBOSE:
+                    print(f"          -> bias_rom[{addr}] = {bias_val}")
             else:
-                dut.bias_rom_dout.value = 0
-                print(f"          -> bias_rom[{addr}] = 0 (out of bounds)")
+                brom_dout.value = 0
+                if VERBOSE:
+                    print(f"          -> bias_rom[{addr}] = 0 (out of bounds)")
         
         # Check if computation is complete
         if int(dut.computation_complete.value) == 1:
-            print(f"Computation completed at cycle {cycle_count}")
+            cocotb.log.info(f"Computation completed at cycle {cycle_count}")
             output_0 = int(dut.output_vector[0].value)
             output_1 = int(dut.output_vector[1].value)
-            print(f"Output[0]: actual={output_0}, expected=320, match={output_0 == 320}")
-            print(f"Output[1]: actual={output_1}, expected=480, match={output_1 == 480}")
+            cocotb.log.info(f"Output[0]: actual={output_0}, expected=320, match={output_0 == 320}")
+            cocotb.log.info(f"Output[1]: actual={output_1}, expected=480, match={output_1 == 480}")
             break
     
     if cycle_count >= max_cycles:
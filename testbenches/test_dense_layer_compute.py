@@ -1,27 +1,122 @@
 import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import RisingEdge
+from cocotb.triggers import RisingEdge, Edge, with_timeout
+from cocotb.regression import TestFactory
+from cocotb.result import SimTimeoutError
+from cocotb.utils import get_sim_time
+import numpy as np
+import os
 import random
 
-@cocotb.test()
-async def test_dense_layer_basic_functionality(dut):
-    """Test basic dense layer computation with small matrices"""
+# Per-cycle state/memory trace in the basic and timing tests; off by default since the trace
+# wakes Python on every clock and costs an extra simulator read per traced signal.
+# Set DENSE_TB_DEBUG=1 (with COCOTB_LOG_LEVEL=DEBUG) to enable it; messages go to dut._log.
+DEBUG = bool(os.environ.get("DENSE_TB_DEBUG"))
+
+# Set when the harness is built with make HDL_CLOCK=1 and toggles clk itself
+HDL_CLOCK = os.environ.get("HDL_CLOCK", "0") == "1"
+
+# dense_layer_compute state encodings (dense_state_t)
+IDLE, LOAD_BIAS, LOAD_DATA, COMPUTE_MAC, OUTPUT_READY, COMPLETE = range(6)
+
+# File name prefix shared with the harness; make parallel gives each test its own
+MEM_PREFIX = cocotb.plusargs.get("mem_prefix", "")
+
+# Memory images read by dense_layer_compute_tb's $readmemh when load_mem is pulsed
+TENSOR_RAM_FILE = MEM_PREFIX + "dense_tensor_ram.hex"
+WEIGHT_ROM_FILE = MEM_PREFIX + "dense_weight_rom.hex"
+BIAS_ROM_FILE = MEM_PREFIX + "dense_bias_rom.hex"
+
+# Memory reads logged by the harness since the last load_mem, one "<t|w|b> <addr>" line per access
+ADDR_TRACE_FILE = MEM_PREFIX + "dense_addr_trace.log"
+
+def write_hex(path, values, bits):
+    """Write values one per line as bits-wide two's complement hex, the format $readmemh expects"""
+    mask = (1 << bits) - 1
+    with open(path, "w") as f:
+        f.writelines(f"{int(v) & mask:0{bits // 4}x}\n" for v in values)
+
+async def load_memories(dut, input_vector, weights_flat, bias_vector):
+    """Write the memory images as two's complement hex and pulse load_mem so the harness reloads them."""
+    write_hex(TENSOR_RAM_FILE, input_vector, 8)
+    write_hex(WEIGHT_ROM_FILE, weights_flat, 8)
+    write_hex(BIAS_ROM_FILE, bias_vector, 32)
+    dut.load_mem.value = 1
+    await RisingEdge(dut.clk)
+    dut.load_mem.value = 0
+
+async def trace_cycles(dut):
+    """Log the per-cycle state, memory and output trace at DEBUG level; only started when DEBUG is set"""
+    core = dut.dut  # dense_layer_compute instance inside the harness
+    log = dut._log
+    
+    # Resolve the traced handles once; signals the core doesn't expose are skipped. The MAC
+    # datapath is left to the harness's VCD dump (WAVES=1) rather than read from Python every cycle
+    core_sigs = [(name, getattr(core, name)) for name in ('current_state', 'input_idx', 'output_idx')
+                 if hasattr(core, name)]
+    tb_sigs = [(name, getattr(dut, name)) for name in
+               ('tensor_ram_re', 'weight_rom_re', 'bias_rom_re',
+                'output_ready', 'output_data', 'output_channel', 'computation_complete')]
+    traced = core_sigs + tb_sigs
     
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
+    cycle_count = 0
+    while True:
+        await RisingEdge(dut.clk)
+        cycle_count += 1
+        
+        # %-style arguments defer formatting until the record is actually emitted
+        log.debug("cycle %d", cycle_count)
+        for name, handle in traced:
+            log.debug("  %s=%s", name, handle.value)
+
+async def reset_and_start(dut, input_size, output_size):
+    """Start the clock, hold the harness in reset for two cycles and apply the layer size"""
+    if not HDL_CLOCK:
+        clock = Clock(dut.clk, 10, units="ns")
+        cocotb.start_soon(clock.start())
     
-    # Reset
     dut.reset.value = 1
     dut.start_compute.value = 0
     dut.input_valid.value = 0
-    dut.input_size.value = 3
-    dut.output_size.value = 2
+    dut.load_mem.value = 0
+    dut.input_size.value = input_size
+    dut.output_size.value = output_size
     
     await RisingEdge(dut.clk)
     await RisingEdge(dut.clk)
     dut.reset.value = 0
     await RisingEdge(dut.clk)
+
+async def collect_outputs(dut, outputs, n):
+    """Append (channel, data) to outputs on each of the next n output_ready pulses"""
+    ordy = dut.output_ready
+    out_ch = dut.output_channel
+    out_data = dut.output_data
+    for _ in range(n):
+        await RisingEdge(ordy)
+        outputs.append((out_ch.value.integer, out_data.value.integer))
+
+def read_output_vector(dut, n):
+    """Read the harness's captured outputs in one access and split out the first n signed 32-bit channels"""
+    vec = dut.output_vector.value.integer
+    outputs = []
+    for ch in range(n):
+        word = (vec >> (32 * ch)) & 0xFFFFFFFF
+        outputs.append(word - (1 << 32) if word & 0x80000000 else word)
+    return outputs
+
+async def wait_for(trigger, timeout_ns, message):
+    """Await trigger with a simulator-side timeout, failing the test with message if it expires"""
+    try:
+        await with_timeout(trigger, timeout_ns, "ns")
+    except SimTimeoutError:
+        assert False, message
+
+@cocotb.test()
+async def test_dense_layer_basic_functionality(dut):
+    """Test basic dense layer computation with small matrices"""
+    
+    await reset_and_start(dut, input_size=3, output_size=2)
     
     # Test data
     input_vector = [2, 3, 1]  # 3 inputs
@@ -40,113 +135,30 @@ async def test_dense_layer_basic_functionality(dut):
     #           = 20 + 2*4 + 3*5 + 1*6 = 20 + 8 + 15 + 6 = 49
     expected_outputs = [21, 49]
     
+    await load_memories(dut, input_vector, weights_flat, bias_vector)
+    
     # Start computation
     dut.input_valid.value = 1
     dut.start_compute.value = 1
     await RisingEdge(dut.clk)
     dut.start_compute.value = 0
     
-    # Track outputs as they become ready
-    received_outputs = {}
-    cycle_count = 0
+    if DEBUG:
+        cocotb.start_soon(trace_cycles(dut))
     
-    while cycle_count < 50:  # Safety limit
-        await RisingEdge(dut.clk)
-        cycle_count += 1
-        
-        # Print detailed MAC trace for each cycle
-        print(f"\n=== Cycle {cycle_count} ===")
-        print(f"State: {int(dut.current_state.value) if hasattr(dut, 'current_state') else 'N/A'}")
-        print(f"Input idx: {int(dut.input_idx.value) if hasattr(dut, 'input_idx') else 'N/A'}")
-        print(f"Output idx: {int(dut.output_idx.value) if hasattr(dut, 'output_idx') else 'N/A'}")
-        print(f"Weight idx: {int(dut.weight_idx.value) if hasattr(dut, 'weight_idx') else 'N/A'}")
-        
-        # MAC unit signals
-        if hasattr(dut, 'mac_inst'):
-            mac = dut.mac_inst
-            print(f"MAC reset: {int(dut.mac_reset.value) if hasattr(dut, 'mac_reset') else 'N/A'}")
-            print(f"MAC load_bias: {int(dut.mac_load_bias.value) if hasattr(dut, 'mac_load_bias') else 'N/A'}")
-            print(f"MAC bias_in: {int(dut.mac_bias_in.value) if hasattr(dut, 'mac_bias_in') else 'N/A'}")
-            print(f"MAC left_in: {int(dut.mac_left_in.value) if hasattr(dut, 'mac_left_in') else 'N/A'}")
-            print(f"MAC top_in: {int(dut.mac_top_in.value) if hasattr(dut, 'mac_top_in') else 'N/A'}")
-            print(f"MAC sum_out: {int(dut.mac_sum_out.value) if hasattr(dut, 'mac_sum_out') else 'N/A'}")
-            
-            # MAC internal signals if accessible
-            if hasattr(mac, 'mult'):
-                print(f"MAC mult: {int(mac.mult.value)}")
-            if hasattr(mac, 'sum'):
-                print(f"MAC sum: {int(mac.sum.value)}")
-            if hasattr(mac, 'accumulator'):
-                print(f"MAC accumulator: {int(mac.accumulator.value)}")
-        
-        # Memory interface signals
-        print(f"Tensor RAM RE: {int(dut.tensor_ram_re.value)}")
-        print(f"Weight ROM RE: {int(dut.weight_rom_re.value)}")
-        print(f"Bias ROM RE: {int(dut.bias_rom_re.value)}")
-        
-        # Provide memory data based on addresses
-        if int(dut.tensor_ram_re.value) == 1:
-            addr = int(dut.tensor_ram_addr.value)
-            if addr < len(input_vector):
-                dut.tensor_ram_dout.value = input_vector[addr]
-                print(f"  Tensor RAM read: addr={addr}, data={input_vector[addr]}")
-            else:
-                dut.tensor_ram_dout.value = 0
-                print(f"  Tensor RAM read: addr={addr}, data=0 (out of bounds)")
-                
-        if int(dut.weight_rom_re.value) == 1:
-            addr = int(dut.weight_rom_addr.value)
-            if addr < len(weights_flat):
-                dut.weight_rom_dout.value = weights_flat[addr]
-                print(f"  Weight ROM read: addr={addr}, data={weights_flat[addr]}")
-            else:
-                dut.weight_rom_dout.value = 0
-                print(f"  Weight ROM read: addr={addr}, data=0 (out of bounds)")
-                
-        if int(dut.bias_rom_re.value) == 1:
-            addr = int(dut.bias_rom_addr.value)
-            if addr < len(bias_vector):
-                dut.bias_rom_dout.value = bias_vector[addr]
-                print(f"  Bias ROM read: addr={addr}, data={bias_vector[addr]}")
-            else:
-                dut.bias_rom_dout.value = 0
-                print(f"  Bias ROM read: addr={addr}, data=0 (out of bounds)")
-        
-        # Output signals
-        print(f"Output ready: {int(dut.output_ready.value)}")
-        print(f"Output data: {int(dut.output_data.value)}")
-        print(f"Output channel: {int(dut.output_channel.value)}")
-        print(f"Computation complete: {int(dut.computation_complete.value)}")
-        
-        # Check if output is ready
-        if int(dut.output_ready.value) == 1:
-            channel = int(dut.output_channel.value)
-            output_data = int(dut.output_data.value)
-            received_outputs[channel] = output_data
-            print(f"*** Received output for channel {channel}: {output_data} ***")
-        
-        # Check if computation is complete
-        if int(dut.computation_complete.value) == 1:
-            print(f"*** Computation completed at cycle {cycle_count} ***")
-            break
-    
-    # Verify outputs
-    assert int(dut.computation_complete.value) == 1, "Computation should be complete"
+    # The harness captures each output_ready result, so only completion needs to be awaited
+    cc = dut.computation_complete
+    if not cc.value.integer:
+        await wait_for(RisingEdge(cc), 500, "Timed out waiting for computation_complete")
     
-    # Check that we received all expected outputs
-    assert len(received_outputs) == len(expected_outputs), f"Expected {len(expected_outputs)} outputs, got {len(received_outputs)}"
+    print(f"Computation completed at {get_sim_time(units='ns')} ns")
     
-    # Check output values
-    for i in range(len(expected_outputs)):
-        assert i in received_outputs, f"Missing output for channel {i}"
-        actual_output = received_outputs[i]
-        expected_output = expected_outputs[i]
-        print(f"Output {i}: Expected {expected_output}, Got {actual_output}")
-        assert actual_output == expected_output, f"Output {i} mismatch: expected {expected_output}, got {actual_output}"
+    # Verify outputs
+    assert cc.value.integer == 1, "Computation should be complete"
     
-    # Verify configuration echo
-    assert int(dut.current_input_size.value) == 3, "Input size should be echoed correctly"
-    assert int(dut.current_output_size.value) == 2, "Output size should be echoed correctly"
+    actual_outputs = read_output_vector(dut, len(expected_outputs))
+    print(f"Outputs: Expected {expected_outputs}, Got {actual_outputs}")
+    assert actual_outputs == expected_outputs, f"Output mismatch: expected {expected_outputs}, got {actual_outputs}"
     
     print("✅ Basic dense layer computation test passed!")
 
@@ -154,58 +166,36 @@ async def test_dense_layer_basic_functionality(dut):
 async def test_dense_layer_state_machine(dut):
     """Test the state machine transitions"""
     
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
+    await reset_and_start(dut, input_size=2, output_size=2)
     
-    # Reset
-    dut.reset.value = 1
-    dut.start_compute.value = 0
-    dut.input_valid.value = 0
-    dut.input_size.value = 2
-    dut.output_size.value = 2
-    
-    # Initialize memory interfaces
-    dut.tensor_ram_dout.value = 1
-    dut.weight_rom_dout.value = 1
-    dut.bias_rom_dout.value = 100
-    
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
+    # Constant memory contents: every input and weight is 1, every bias 100
+    await load_memories(dut, [1] * 2, [1] * 4, [100] * 2)
+    # State register of the dense_layer_compute instance inside the harness, if the simulator exposes it
+    state = getattr(dut.dut, 'current_state', None)
     
-    # Should be in IDLE state (0)
-    if hasattr(dut, 'current_state'):
-        assert int(dut.current_state.value) == 0, "Should start in IDLE state"
+    if state is not None:
+        assert state.value.integer == IDLE, "Should start in IDLE state"
     
     # Start computation
     dut.input_valid.value = 1
     dut.start_compute.value = 1
-    await RisingEdge(dut.clk)
-    dut.start_compute.value = 0
     
-    # Should transition to LOAD_BIAS state (1)
-    await RisingEdge(dut.clk)
-    if hasattr(dut, 'current_state'):
-        assert int(dut.current_state.value) == 1, "Should be in LOAD_BIAS state"
-    
-    # Should transition to COMPUTE_MAC state (2)
-    await RisingEdge(dut.clk)
-    if hasattr(dut, 'current_state'):
-        assert int(dut.current_state.value) == 2, "Should transition to COMPUTE_MAC state"
+    if state is not None:
+        # Wake only when the state register changes instead of checking it every clock
+        for expected, name in ((LOAD_BIAS, "LOAD_BIAS"), (LOAD_DATA, "LOAD_DATA"), (COMPUTE_MAC, "COMPUTE_MAC")):
+            await wait_for(Edge(state), 100, f"Timed out waiting for {name} state")
+            dut.start_compute.value = 0
+            assert state.value.integer == expected, f"Should transition to {name} state"
+    else:
+        await RisingEdge(dut.clk)
+        dut.start_compute.value = 0
     
     # Wait for computation to complete
-    compute_cycles = 0
-    while compute_cycles < 20:  # Safety limit
-        await RisingEdge(dut.clk)
-        compute_cycles += 1
-        if int(dut.computation_complete.value) == 1:
-            break
+    if not dut.computation_complete.value.integer:
+        await wait_for(RisingEdge(dut.computation_complete), 200, "Timed out waiting for computation_complete")
     
-    # Should be in COMPLETE state (4) - updated for new state machine
-    if hasattr(dut, 'current_state'):
-        assert int(dut.current_state.value) == 4, "Should be in COMPLETE state"
+    if state is not None:
+        assert state.value.integer == COMPLETE, "Should be in COMPLETE state"
     
     print("✅ State machine test passed!")
 
@@ -213,26 +203,10 @@ async def test_dense_layer_state_machine(dut):
 async def test_dense_layer_memory_addressing(dut):
     """Test memory address generation"""
     
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
+    await reset_and_start(dut, input_size=3, output_size=2)
     
-    # Reset
-    dut.reset.value = 1
-    dut.start_compute.value = 0
-    dut.input_valid.value = 0
-    dut.input_size.value = 3
-    dut.output_size.value = 2
-    
-    # Initialize memory interfaces
-    dut.tensor_ram_dout.value = 1
-    dut.weight_rom_dout.value = 1
-    dut.bias_rom_dout.value = 100
-    
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
+    # Constant memory contents; only the addresses matter here
+    await load_memories(dut, [1] * 3, [1] * 6, [100] * 2)
     
     # Start computation
     dut.input_valid.value = 1
@@ -240,28 +214,17 @@ async def test_dense_layer_memory_addressing(dut):
     await RisingEdge(dut.clk)
     dut.start_compute.value = 0
     
-    # Track memory accesses
-    tensor_addresses = []
-    weight_addresses = []
-    bias_addresses = []
+    # The harness logs every memory read; wait for completion and parse the trace once
+    await wait_for(RisingEdge(dut.computation_complete), 500, "Timed out waiting for computation_complete")
     
-    cycle_count = 0
-    while cycle_count < 50:
-        await RisingEdge(dut.clk)
-        cycle_count += 1
-        
-        # Record memory accesses
-        if int(dut.tensor_ram_re.value) == 1:
-            tensor_addresses.append(int(dut.tensor_ram_addr.value))
-            
-        if int(dut.weight_rom_re.value) == 1:
-            weight_addresses.append(int(dut.weight_rom_addr.value))
-            
-        if int(dut.bias_rom_re.value) == 1:
-            bias_addresses.append(int(dut.bias_rom_addr.value))
-        
-        if int(dut.computation_complete.value) == 1:
-            break
+    addresses = {"t": [], "w": [], "b": []}
+    with open(ADDR_TRACE_FILE) as trace:
+        for line in trace:
+            port, addr = line.split()
+            addresses[port].append(int(addr))
+    tensor_addresses = addresses["t"]
+    weight_addresses = addresses["w"]
+    bias_addresses = addresses["b"]
     
     # Verify bias addresses (should be 0, 1 for 2 outputs)
     expected_bias_addrs = [0, 1]
@@ -282,54 +245,27 @@ async def test_dense_layer_memory_addressing(dut):
 async def test_dense_layer_edge_cases(dut):
     """Test edge cases like single input/output"""
     
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
-    
-    # Reset
-    dut.reset.value = 1
-    dut.start_compute.value = 0
-    dut.input_valid.value = 0
-    
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
+    await reset_and_start(dut, input_size=1, output_size=1)
     
     # Test 1: Single input, single output
-    dut.input_size.value = 1
-    dut.output_size.value = 1
+    # Test data: input=5, weight=3, bias=2 -> output=5*3+2=17
+    await load_memories(dut, [5], [3], [2])
+    
     dut.input_valid.value = 1
     dut.start_compute.value = 1
     
-    # Test data: input=5, weight=3, bias=2 -> output=5*3+2=17
-    dut.tensor_ram_dout.value = 5
-    dut.weight_rom_dout.value = 3
-    dut.bias_rom_dout.value = 2
-    
     await RisingEdge(dut.clk)
     dut.start_compute.value = 0
     
-    # Wait for completion and capture output
-    cycle_count = 0
-    output_received = False
-    actual_output = 0
+    # Wait for the single output pulse, then completion
+    await wait_for(RisingEdge(dut.output_ready), 200, "Should have received output")
+    actual_output = int(dut.output_data.value)
+    print(f"Single output test: Got {actual_output}")
     
-    while cycle_count < 20:
-        await RisingEdge(dut.clk)
-        cycle_count += 1
-        
-        # Check if output is ready
-        if int(dut.output_ready.value) == 1:
-            actual_output = int(dut.output_data.value)
-            output_received = True
-            print(f"Single output test: Got {actual_output}")
-        
-        if int(dut.computation_complete.value) == 1:
-            break
+    if not int(dut.computation_complete.value):
+        await wait_for(RisingEdge(dut.computation_complete), 200, "Timed out waiting for computation_complete")
     
     # Verify single output
-    assert output_received, "Should have received output"
     assert actual_output == 17, f"Expected 17, got {actual_output}"
     
     print("✅ Edge cases test passed!")
@@ -338,114 +274,32 @@ async def test_dense_layer_edge_cases(dut):
 async def test_dense_layer_multiple_outputs_timing(dut):
     """Test that outputs are produced in correct order and timing"""
     
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
-    
-    # Reset
-    dut.reset.value = 1
-    dut.start_compute.value = 0
-    dut.input_valid.value = 0
-    dut.input_size.value = 2
-    dut.output_size.value = 3
-    
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
+    await reset_and_start(dut, input_size=2, output_size=3)
     
     # Test data
     input_vector = [1, 2]
     weights_flat = [1, 2, 3, 4, 5, 6]  # 2 inputs × 3 outputs
     bias_vector = [10, 20, 30]
     
+    await load_memories(dut, input_vector, weights_flat, bias_vector)
+    
     # Start computation
     dut.input_valid.value = 1
     dut.start_compute.value = 1
     await RisingEdge(dut.clk)
     dut.start_compute.value = 0
     
-    # Track output order
+    if DEBUG:
+        cocotb.start_soon(trace_cycles(dut))
+    
+    # Track output order from a collector coroutine woken only on each output_ready pulse
     output_order = []
-    cycle_count = 0
+    collector = cocotb.start_soon(collect_outputs(dut, output_order, 3))
     
-    while cycle_count < 50:
-        await RisingEdge(dut.clk)
-        cycle_count += 1
-        
-        # Print detailed MAC trace for each cycle
-        print(f"\n=== Cycle {cycle_count} ===")
-        print(f"State: {int(dut.current_state.value) if hasattr(dut, 'current_state') else 'N/A'}")
-        print(f"Input idx: {int(dut.input_idx.value) if hasattr(dut, 'input_idx') else 'N/A'}")
-        print(f"Output idx: {int(dut.output_idx.value) if hasattr(dut, 'output_idx') else 'N/A'}")
-        print(f"Weight idx: {int(dut.weight_idx.value) if hasattr(dut, 'weight_idx') else 'N/A'}")
-        
-        # MAC unit signals
-        if hasattr(dut, 'mac_inst'):
-            mac = dut.mac_inst
-            print(f"MAC reset: {int(dut.mac_reset.value) if hasattr(dut, 'mac_reset') else 'N/A'}")
-            print(f"MAC load_bias: {int(dut.mac_load_bias.value) if hasattr(dut, 'mac_load_bias') else 'N/A'}")
-            print(f"MAC bias_in: {int(dut.mac_bias_in.value) if hasattr(dut, 'mac_bias_in') else 'N/A'}")
-            print(f"MAC left_in: {int(dut.mac_left_in.value) if hasattr(dut, 'mac_left_in') else 'N/A'}")
-            print(f"MAC top_in: {int(dut.mac_top_in.value) if hasattr(dut, 'mac_top_in') else 'N/A'}")
-            print(f"MAC sum_out: {int(dut.mac_sum_out.value) if hasattr(dut, 'mac_sum_out') else 'N/A'}")
-            
-            # MAC internal signals if accessible
-            if hasattr(mac, 'mult'):
-                print(f"MAC mult: {int(mac.mult.value)}")
-            if hasattr(mac, 'sum'):
-                print(f"MAC sum: {int(mac.sum.value)}")
-            if hasattr(mac, 'accumulator'):
-                print(f"MAC accumulator: {int(mac.accumulator.value)}")
-        
-        # Memory interface signals
-        print(f"Tensor RAM RE: {int(dut.tensor_ram_re.value)}")
-        print(f"Weight ROM RE: {int(dut.weight_rom_re.value)}")
-        print(f"Bias ROM RE: {int(dut.bias_rom_re.value)}")
-        
-        # Provide memory data based on addresses
-        if int(dut.tensor_ram_re.value) == 1:
-            addr = int(dut.tensor_ram_addr.value)
-            if addr < len(input_vector):
-                dut.tensor_ram_dout.value = input_vector[addr]
-                print(f"  Tensor RAM read: addr={addr}, data={input_vector[addr]}")
-            else:
-                dut.tensor_ram_dout.value = 0
-                print(f"  Tensor RAM read: addr={addr}, data=0 (out of bounds)")
-                
-        if int(dut.weight_rom_re.value) == 1:
-            addr = int(dut.weight_rom_addr.value)
-            if addr < len(weights_flat):
-                dut.weight_rom_dout.value = weights_flat[addr]
-                print(f"  Weight ROM read: addr={addr}, data={weights_flat[addr]}")
-            else:
-                dut.weight_rom_dout.value = 0
-                print(f"  Weight ROM read: addr={addr}, data=0 (out of bounds)")
-                
-        if int(dut.bias_rom_re.value) == 1:
-            addr = int(dut.bias_rom_addr.value)
-            if addr < len(bias_vector):
-                dut.bias_rom_dout.value = bias_vector[addr]
-                print(f"  Bias ROM read: addr={addr}, data={bias_vector[addr]}")
-            else:
-                dut.bias_rom_dout.value = 0
-                print(f"  Bias ROM read: addr={addr}, data=0 (out of bounds)")
-        
-        # Output signals
-        print(f"Output ready: {int(dut.output_ready.value)}")
-        print(f"Output data: {int(dut.output_data.value)}")
-        print(f"Output channel: {int(dut.output_channel.value)}")
-        print(f"Computation complete: {int(dut.computation_complete.value)}")
-        
-        # Check if output is ready
-        if int(dut.output_ready.value) == 1:
-            channel = int(dut.output_channel.value)
-            output_data = int(dut.output_data.value)
-            output_order.append((channel, output_data))
-            print(f"Output {channel}: {output_data}")
-        
-        if int(dut.computation_complete.value) == 1:
-            break
+    cc = dut.computation_complete
+    if not cc.value.integer:
+        await wait_for(RisingEdge(cc), 500, "Timed out waiting for computation_complete")
+    collector.kill()
     
     # Verify outputs are produced in order (0, 1, 2)
     assert len(output_order) == 3, f"Expected 3 outputs, got {len(output_order)}"
@@ -455,5 +309,41 @@ async def test_dense_layer_multiple_outputs_timing(dut):
     
     print("✅ Multiple outputs timing test passed!")
 
+async def run_random_layer(dut, shape):
+    """Check a random dense layer of the given (input_size, output_size) against a NumPy reference"""
+    input_size, output_size = shape
+    
+    await reset_and_start(dut, input_size=input_size, output_size=output_size)
+    
+    # Small operand ranges keep every accumulator well inside 32 bits
+    rng = np.random.default_rng(input_size * 1000 + output_size)
+    input_vector = rng.integers(-8, 8, input_size, dtype=np.int8)
+    weight_matrix = rng.integers(-8, 8, (output_size, input_size), dtype=np.int8)
+    bias_vector = rng.integers(-100, 100, output_size, dtype=np.int32)
+    expected_outputs = weight_matrix.astype(np.int32) @ input_vector.astype(np.int32) + bias_vector
+    
+    # Row-major weights match the DUT's output_idx * input_size + input_idx ROM addressing
+    await load_memories(dut, input_vector.tolist(), weight_matrix.reshape(-1).tolist(), bias_vector.tolist())
+    
+    dut.input_valid.value = 1
+    dut.start_compute.value = 1
+    await RisingEdge(dut.clk)
+    dut.start_compute.value = 0
+    
+    # Each output takes a bias load plus two cycles per input and an output cycle; allow twice that
+    timeout_ns = 2 * 10 * output_size * (2 * input_size + 3)
+    await wait_for(RisingEdge(dut.computation_complete), timeout_ns, "Timed out waiting for computation_complete")
+    
+    actual_outputs = np.array(read_output_vector(dut, output_size), dtype=np.int32)
+    assert np.array_equal(actual_outputs, expected_outputs), \
+        f"{input_size}->{output_size} mismatch: expected {expected_outputs.tolist()}, got {actual_outputs.tolist()}"
+    
+    print(f"✅ Random {input_size}->{output_size} dense layer test passed!")
+
+# One generated test per layer shape
+factory = TestFactory(run_random_layer)
+factory.add_option("shape", [(3, 2), (16, 8), (64, 32)])
+factory.generate_tests()
+
 if __name__ == "__main__":
     print("Dense layer compute testbench") 
\ No newline at end of file
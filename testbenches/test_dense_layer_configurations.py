@@ -2,43 +2,58 @@ import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, Timer
 import numpy as np
+from tb_common import load_operands
 
-@cocotb.test()
-async def test_dense_layer_256_to_64(dut):
-    """Test first dense layer: 256 inputs -> 64 outputs (dense1_relu6)"""
-    
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
-    
-    # Reset
+# Seed for the per-test operand generators
+SEED = 0xC0C07B
+
+def ensure_clock(dut):
+    """Start the 10ns testbench clock unless one is still running (cocotb kills it when its test ends)"""
+    task = getattr(dut, "_clk_task", None)
+    if task is None or task.done():
+        dut._clk_task = cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+
+async def reset_dut(dut):
+    """Hold reset for two clocks and release it"""
     dut.reset.value = 1
     await RisingEdge(dut.clk)
     await RisingEdge(dut.clk)
     dut.reset.value = 0
     await RisingEdge(dut.clk)
+
+def timeout_cycles(input_size, output_size):
+    """Completion bound: LOAD_BIAS, input_size x (LOAD_DATA, COMPUTE_MAC) and OUTPUT_READY per output, with one spare cycle per output plus slack"""
+    return output_size * (2 * input_size + 3) + 16
+
+def read_outputs(dut, output_size):
+    """Read the first output_size int32 results from output_vector"""
+    return np.fromiter((dut.output_vector[i].value.signed_integer for i in range(output_size)),
+                       dtype=np.int32, count=output_size)
+
+def reference_output(input_vector, weight_matrix, bias_vector):
+    """int32 reference for input_vector @ weight_matrix + bias_vector"""
+    return input_vector.astype(np.int32) @ weight_matrix + bias_vector
+
+@cocotb.test()
+async def test_dense_layer_256_to_64(dut):
+    """Test first dense layer: 256 inputs -> 64 outputs (dense1_relu6)"""
+    
+    # Start clock and reset
+    ensure_clock(dut)
+    await reset_dut(dut)
     
     # Test parameters for first dense layer
     INPUT_SIZE = 256  # Flattened from 4x4x16
     OUTPUT_SIZE = 64  # First dense layer output
     
     # Create test data (smaller range for manageable numbers)
-    input_vector = np.random.randint(-10, 10, INPUT_SIZE, dtype=np.int8)
-    weight_matrix = np.random.randint(-3, 3, (INPUT_SIZE, OUTPUT_SIZE), dtype=np.int8)
-    bias_vector = np.random.randint(-50, 50, OUTPUT_SIZE, dtype=np.int32)
+    rng = np.random.default_rng(SEED)  # PCG64, reseeded per test so runs are reproducible
+    input_vector = rng.integers(-10, 10, INPUT_SIZE, dtype=np.int8)
+    weight_matrix = rng.integers(-3, 3, (INPUT_SIZE, OUTPUT_SIZE), dtype=np.int8)
+    bias_vector = rng.integers(-50, 50, OUTPUT_SIZE, dtype=np.int32)
     
-    # Load input vector
-    for i in range(INPUT_SIZE):
-        dut.input_vector[i].value = int(input_vector[i])
-    
-    # Load weight matrix
-    for i in range(INPUT_SIZE):
-        for j in range(OUTPUT_SIZE):
-            dut.weight_matrix[i][j].value = int(weight_matrix[i, j])
-    
-    # Load bias vector
-    for i in range(OUTPUT_SIZE):
-        dut.bias_vector[i].value = int(bias_vector[i])
+    # Load operands
+    load_operands(dut, input_vector, weight_matrix, bias_vector)
     
     # Set control signals
     dut.input_valid.value = 1
@@ -49,21 +64,21 @@ async def test_dense_layer_256_to_64(dut):
     
     # Wait for computation to complete
     cycle_count = 0
-    while not dut.computation_complete.value:
-        await RisingEdge(dut.clk)
+    clk_edge = RisingEdge(dut.clk)  # one trigger object reused for every polled cycle
+    done = dut.computation_complete
+    while not done.value:
+        await clk_edge
         cycle_count += 1
-        if cycle_count > 50000:  # Timeout protection
+        if cycle_count > timeout_cycles(INPUT_SIZE, OUTPUT_SIZE):  # Timeout protection
             assert False, "Computation did not complete within reasonable time"
     
     print(f"Dense 256→64 computation completed in {cycle_count} cycles")
     
     # Read outputs
-    hw_output = []
-    for i in range(OUTPUT_SIZE):
-        hw_output.append(int(dut.output_vector[i].value.signed_integer))
+    hw_output = read_outputs(dut, OUTPUT_SIZE)
     
     # Calculate expected output using numpy
-    expected_output = np.dot(input_vector.astype(np.int32), weight_matrix.astype(np.int32)) + bias_vector
+    expected_output = reference_output(input_vector, weight_matrix, bias_vector)
     
     print(f"First 5 hardware outputs: {hw_output[:5]}")
     print(f"First 5 expected outputs: {expected_output[:5]}")
@@ -78,38 +93,22 @@ async def test_dense_layer_256_to_64(dut):
 async def test_dense_layer_64_to_10(dut):
     """Test second dense layer: 64 inputs -> 10 outputs (output_softmax)"""
     
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
-    
-    # Reset
-    dut.reset.value = 1
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
+    # Start clock and reset
+    ensure_clock(dut)
+    await reset_dut(dut)
     
     # Test parameters for second dense layer
     INPUT_SIZE = 64   # Output from first dense layer
     OUTPUT_SIZE = 10  # Final classification output
     
     # Create test data
-    input_vector = np.random.randint(-20, 20, INPUT_SIZE, dtype=np.int8)
-    weight_matrix = np.random.randint(-5, 5, (INPUT_SIZE, OUTPUT_SIZE), dtype=np.int8)
-    bias_vector = np.random.randint(-100, 100, OUTPUT_SIZE, dtype=np.int32)
-    
-    # Load input vector
-    for i in range(INPUT_SIZE):
-        dut.input_vector[i].value = int(input_vector[i])
+    rng = np.random.default_rng(SEED)  # PCG64, reseeded per test so runs are reproducible
+    input_vector = rng.integers(-20, 20, INPUT_SIZE, dtype=np.int8)
+    weight_matrix = rng.integers(-5, 5, (INPUT_SIZE, OUTPUT_SIZE), dtype=np.int8)
+    bias_vector = rng.integers(-100, 100, OUTPUT_SIZE, dtype=np.int32)
     
-    # Load weight matrix
-    for i in range(INPUT_SIZE):
-        for j in range(OUTPUT_SIZE):
-            dut.weight_matrix[i][j].value = int(weight_matrix[i, j])
-    
-    # Load bias vector
-    for i in range(OUTPUT_SIZE):
-        dut.bias_vector[i].value = int(bias_vector[i])
+    # Load operands
+    load_operands(dut, input_vector, weight_matrix, bias_vector)
     
     # Set control signals
     dut.input_valid.value = 1
@@ -120,21 +119,21 @@ async def test_dense_layer_64_to_10(dut):
     
     # Wait for computation to complete
     cycle_count = 0
-    while not dut.computation_complete.value:
-        await RisingEdge(dut.clk)
+    clk_edge = RisingEdge(dut.clk)  # one trigger object reused for every polled cycle
+    done = dut.computation_complete
+    while not done.value:
+        await clk_edge
         cycle_count += 1
-        if cycle_count > 10000:  # Timeout protection
+        if cycle_count > timeout_cycles(INPUT_SIZE, OUTPUT_SIZE):  # Timeout protection
             assert False, "Computation did not complete within reasonable time"
     
     print(f"Dense 64→10 computation completed in {cycle_count} cycles")
     
     # Read outputs
-    hw_output = []
-    for i in range(OUTPUT_SIZE):
-        hw_output.append(int(dut.output_vector[i].value.signed_integer))
+    hw_output = read_outputs(dut, OUTPUT_SIZE)
     
     # Calculate expected output using numpy
-    expected_output = np.dot(input_vector.astype(np.int32), weight_matrix.astype(np.int32)) + bias_vector
+    expected_output = reference_output(input_vector, weight_matrix, bias_vector)
     
     print(f"Hardware outputs: {hw_output}")
     print(f"Expected outputs: {expected_output}")
@@ -150,8 +149,7 @@ async def test_dense_layer_performance_comparison(dut):
     """Compare performance between different dense layer sizes"""
     
     # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
+    ensure_clock(dut)
     
     test_configs = [
         {"input_size": 64, "output_size": 10, "name": "64→10"},
@@ -159,34 +157,30 @@ async def test_dense_layer_performance_comparison(dut):
         {"input_size": 8, "output_size": 4, "name": "8→4 (small test)"}
     ]
     
+    # Generate operands for the largest configuration once; smaller ones use the leading slices
+    rng = np.random.default_rng(SEED)
+    max_in = max(config["input_size"] for config in test_configs)
+    max_out = max(config["output_size"] for config in test_configs)
+    input_full = rng.integers(-10, 10, max_in, dtype=np.int8)
+    weight_full = rng.integers(-3, 3, (max_in, max_out), dtype=np.int8)
+    bias_full = rng.integers(-50, 50, max_out, dtype=np.int32)
+    
     for config in test_configs:
         print(f"\n--- Testing {config['name']} configuration ---")
         
         INPUT_SIZE = config["input_size"]
         OUTPUT_SIZE = config["output_size"]
         
-        # Reset
-        dut.reset.value = 1
-        await RisingEdge(dut.clk)
-        await RisingEdge(dut.clk)
-        dut.reset.value = 0
-        await RisingEdge(dut.clk)
+        # Reset between configurations so no state carries over
+        await reset_dut(dut)
         
-        # Create test data
-        input_vector = np.random.randint(-10, 10, INPUT_SIZE, dtype=np.int8)
-        weight_matrix = np.random.randint(-3, 3, (INPUT_SIZE, OUTPUT_SIZE), dtype=np.int8)
-        bias_vector = np.random.randint(-50, 50, OUTPUT_SIZE, dtype=np.int32)
+        # Test data: views into the shared operands
+        input_vector = input_full[:INPUT_SIZE]
+        weight_matrix = weight_full[:INPUT_SIZE, :OUTPUT_SIZE]
+        bias_vector = bias_full[:OUTPUT_SIZE]
         
         # Load data
-        for i in range(INPUT_SIZE):
-            dut.input_vector[i].value = int(input_vector[i])
-        
-        for i in range(INPUT_SIZE):
-            for j in range(OUTPUT_SIZE):
-                dut.weight_matrix[i][j].value = int(weight_matrix[i, j])
-        
-        for i in range(OUTPUT_SIZE):
-            dut.bias_vector[i].value = int(bias_vector[i])
+        load_operands(dut, input_vector, weight_matrix, bias_vector)
         
         # Start computation and measure cycles
         dut.input_valid.value = 1
@@ -195,10 +189,12 @@ async def test_dense_layer_performance_comparison(dut):
         dut.start_compute.value = 0
         
         cycle_count = 0
-        while not dut.computation_complete.value:
-            await RisingEdge(dut.clk)
+        clk_edge = RisingEdge(dut.clk)  # one trigger object reused for every polled cycle
+        done = dut.computation_complete
+        while not done.value:
+            await clk_edge
             cycle_count += 1
-            if cycle_count > 100000:
+            if cycle_count > timeout_cycles(INPUT_SIZE, OUTPUT_SIZE):
                 assert False, f"Computation did not complete for {config['name']}"
         
         # Calculate theoretical cycles (INPUT_SIZE * OUTPUT_SIZE + overhead)
@@ -209,11 +205,9 @@ async def test_dense_layer_performance_comparison(dut):
         print(f"  Efficiency: {theoretical_cycles/cycle_count*100:.1f}%")
         
         # Verify correctness
-        hw_output = []
-        for i in range(OUTPUT_SIZE):
-            hw_output.append(int(dut.output_vector[i].value.signed_integer))
+        hw_output = read_outputs(dut, OUTPUT_SIZE)
         
-        expected_output = np.dot(input_vector.astype(np.int32), weight_matrix.astype(np.int32)) + bias_vector
+        expected_output = reference_output(input_vector, weight_matrix, bias_vector)
         
         for i in range(OUTPUT_SIZE):
             assert hw_output[i] == expected_output[i], f"{config['name']} Output {i}: got {hw_output[i]}, expected {expected_output[i]}"
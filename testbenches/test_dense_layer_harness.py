@@ -1,33 +1,49 @@
 import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import ClockCycles, RisingEdge
+from cocotb.triggers import ClockCycles, RisingEdge, ReadOnly
 import numpy as np
+import logging
+
+# dense_layer_compute state decode for the debug trace; unknown encodings print as their number
+STATE_NAMES = dict(enumerate(('IDLE', 'LOAD_BIAS', 'LOAD_DATA', 'COMPUTE_MAC', 'OUTPUT_READY', 'COMPLETE')))
 
 async def load_memories(dut, input_vector, weight_matrix):
     """Load test data into the memory modules (except bias ROM which is file-initialized)"""
     
+    # Weight matrix in row-major order, the layout dense_layer_compute addresses
+    weights_flat = [int(val) for row in weight_matrix for val in row]
+    
+    if hasattr(dut, 'tensor_ram') and hasattr(dut, 'weight_rom'):
+        # Deposit straight into the harness memory arrays: no write port cycles, one settling edge
+        for i, val in enumerate(input_vector):
+            dut.tensor_ram[i].setimmediatevalue(int(val))
+        for i, val in enumerate(weights_flat):
+            dut.weight_rom[i].setimmediatevalue(val)
+        await RisingEdge(dut.clk)
+        return
+    
+    # Fall back to the init write ports, one entry per clock
+    clk_edge = RisingEdge(dut.clk)
+    
     # Load tensor RAM (input vector)
     for i, val in enumerate(input_vector):
         dut.tensor_ram_we.value = 1
         dut.tensor_ram_init_addr.value = i
         dut.tensor_ram_init_data.value = int(val)
-        await RisingEdge(dut.clk)
+        await clk_edge
     
     dut.tensor_ram_we.value = 0
-    await RisingEdge(dut.clk)
+    await clk_edge
     
-    # Load weight ROM (weight matrix in row-major order)
-    weight_idx = 0
-    for row in weight_matrix:
-        for val in row:
-            dut.weight_rom_we.value = 1
-            dut.weight_rom_init_addr.value = weight_idx
-            dut.weight_rom_init_data.value = int(val)
-            weight_idx += 1
-            await RisingEdge(dut.clk)
+    # Load weight ROM
+    for i, val in enumerate(weights_flat):
+        dut.weight_rom_we.value = 1
+        dut.weight_rom_init_addr.value = i
+        dut.weight_rom_init_data.value = val
+        await clk_edge
     
     dut.weight_rom_we.value = 0
-    await RisingEdge(dut.clk)
+    await clk_edge
 
 @cocotb.test()
 async def test_dense_layer_harness_basic(dut):
@@ -73,95 +89,113 @@ async def test_dense_layer_harness_basic(dut):
     await RisingEdge(dut.clk)
     dut.start_compute.value = 0
     
-    # Wait for outputs and collect results
-    outputs = {}
+    # Wait for outputs and collect results; seen has bit c set once channel c has reported
+    num_outputs = len(weight_matrix)
+    outputs = np.full(num_outputs, np.iinfo(np.int32).min, dtype=np.int32)
+    seen = 0
     cycle_count = 0
     max_cycles = 50
     
+    # Resolve the optional internal handles once; None when the simulator doesn't expose them
+    core = dut.dut
+    state_h = getattr(core, 'current_state', None)
+    next_state_h = getattr(core, 'next_state', None)
+    input_idx_h = getattr(core, 'input_idx', None)
+    output_idx_h = getattr(core, 'output_idx', None)
+    mac_load_bias_h = getattr(core, 'mac_load_bias', None)
+    mac_bias_in_h = getattr(core, 'mac_bias_in', None)
+    out_ch_h = getattr(core, 'current_output_channel', None)
+    tensor_dout_h = getattr(dut, 'tensor_ram_dout', None)
+    weight_dout_h = getattr(dut, 'weight_rom_dout', None)
+    
+    log = dut._log
+    dbg = log.isEnabledFor(logging.DEBUG)
+    
+    # Layer size is fixed once configured, so read it once rather than every traced cycle
+    input_size = int(dut.input_size.value)
+    output_size = int(dut.output_size.value)
+    
+    clk_edge = RisingEdge(dut.clk)  # one trigger object reused for every polled cycle
+    read_only = ReadOnly()  # sample each cycle once its values have settled; the loop only reads
     while not dut.computation_complete.value and cycle_count < max_cycles:
-        await RisingEdge(dut.clk)
+        await clk_edge
+        await read_only
         cycle_count += 1
         
-        # Debug: Monitor input_idx changes within COMPUTE_MAC state
-        if hasattr(dut.dut, 'current_state') and hasattr(dut.dut, 'input_idx'):
-            current_state = int(dut.dut.current_state.value)
-            if current_state == 3:  # COMPUTE_MAC state (was 2, now 3 after adding LOAD_DATA)
-                input_idx = int(dut.dut.input_idx.value)
-                input_size = int(dut.input_size.value)
+        # Per-cycle trace, only evaluated when DEBUG logging is enabled (e.g. COCOTB_LOG_LEVEL=DEBUG)
+        if dbg:
+            current_state = int(state_h.value) if state_h is not None else None
+            
+            # Debug: Monitor input_idx changes within COMPUTE_MAC state
+            if current_state == 3 and input_idx_h is not None:  # COMPUTE_MAC state (was 2, now 3 after adding LOAD_DATA)
+                input_idx = int(input_idx_h.value)
                 # Also monitor MAC inputs
-                if hasattr(dut, 'tensor_ram_dout') and hasattr(dut, 'weight_rom_dout'):
-                    tensor_val = int(dut.tensor_ram_dout.value)
-                    weight_val = int(dut.weight_rom_dout.value)
-                    # Convert to signed int8 for display
-                    tensor_signed = tensor_val if tensor_val < 128 else tensor_val - 256
-                    weight_signed = weight_val if weight_val < 128 else weight_val - 256
-                    print(f"*** COMPUTE_MAC: input_idx={input_idx}, tensor={tensor_signed}, weight={weight_signed}, product={tensor_signed*weight_signed} ***")
+                if tensor_dout_h is not None and weight_dout_h is not None:
+                    # Let BinaryValue sign-extend the int8 bytes for display
+                    tensor_signed = tensor_dout_h.value.signed_integer
+                    weight_signed = weight_dout_h.value.signed_integer
+                    log.debug("COMPUTE_MAC: input_idx=%d, tensor=%d, weight=%d, product=%d", input_idx, tensor_signed, weight_signed, tensor_signed * weight_signed)
                 else:
-                    print(f"*** COMPUTE_MAC: input_idx={input_idx}, input_size={input_size}, condition={input_idx < input_size - 1} ***")
-        
-        # Debug: Print state transitions and key indices
-        if hasattr(dut.dut, 'current_state') and hasattr(dut.dut, 'next_state'):
-            current_state = int(dut.dut.current_state.value)
-            next_state = int(dut.dut.next_state.value)
-            if current_state != next_state:
-                state_names = ['IDLE', 'LOAD_BIAS', 'LOAD_DATA', 'COMPUTE_MAC', 'OUTPUT_READY', 'COMPLETE']
-                curr_name = state_names[current_state] if current_state < len(state_names) else str(current_state)
-                next_name = state_names[next_state] if next_state < len(state_names) else str(next_state)
-                # Also print key indices during state transitions
-                if hasattr(dut.dut, 'input_idx') and hasattr(dut.dut, 'output_idx'):
-                    input_idx = int(dut.dut.input_idx.value)
-                    output_idx = int(dut.dut.output_idx.value)
-                    input_size = int(dut.input_size.value)
-                    output_size = int(dut.output_size.value)
-                    print(f"*** State transition: {curr_name} -> {next_name} (input_idx={input_idx}, output_idx={output_idx}, input_size={input_size}, output_size={output_size}) ***")
+                    log.debug("COMPUTE_MAC: input_idx=%d, input_size=%d, condition=%s", input_idx, input_size, input_idx < input_size - 1)
+            
+            # Debug: Print state transitions and key indices
+            if current_state is not None and next_state_h is not None:
+                next_state = int(next_state_h.value)
+                if current_state != next_state:
+                    curr_name = STATE_NAMES.get(current_state, str(current_state))
+                    next_name = STATE_NAMES.get(next_state, str(next_state))
+                    # Also print key indices during state transitions
+                    if input_idx_h is not None and output_idx_h is not None:
+                        input_idx = int(input_idx_h.value)
+                        output_idx = int(output_idx_h.value)
+                        log.debug("State transition: %s -> %s (input_idx=%d, output_idx=%d, input_size=%d, output_size=%d)", curr_name, next_name, input_idx, output_idx, input_size, output_size)
+                    else:
+                        log.debug("State transition: %s -> %s", curr_name, next_name)
+            
+            # Debug: Print bias ROM reads
+            if dut.bias_rom_re.value:
+                bias_addr = int(dut.bias_rom_addr.value)
+                bias_data = int(dut.bias_rom_dout.value)
+                # Also check output_idx in dense layer compute
+                if output_idx_h is not None:
+                    output_idx = int(output_idx_h.value)
+                    log.debug("Bias ROM read: addr=%d, data=%d, output_idx=%d", bias_addr, bias_data, output_idx)
                 else:
-                    print(f"*** State transition: {curr_name} -> {next_name} ***")
-        
-        # Debug: Print bias ROM reads
-        if dut.bias_rom_re.value:
-            bias_addr = int(dut.bias_rom_addr.value)
-            bias_data = int(dut.bias_rom_dout.value)
-            # Also check output_idx in dense layer compute
-            if hasattr(dut.dut, 'output_idx'):
-                output_idx = int(dut.dut.output_idx.value)
-                print(f"*** Bias ROM read: addr={bias_addr}, data={bias_data}, output_idx={output_idx} ***")
-            else:
-                print(f"*** Bias ROM read: addr={bias_addr}, data={bias_data} ***")
-        
-        # Debug: Print MAC unit bias loading
-        if hasattr(dut.dut, 'mac_load_bias') and dut.dut.mac_load_bias.value:
-            if hasattr(dut.dut, 'mac_bias_in'):
-                bias_in = int(dut.dut.mac_bias_in.value)
-                # Also get current output channel being computed
-                if hasattr(dut.dut, 'current_output_channel'):
-                    out_ch = int(dut.dut.current_output_channel.value)
-                    print(f"*** MAC load bias for output {out_ch}: bias_in={bias_in} ***")
+                    log.debug("Bias ROM read: addr=%d, data=%d", bias_addr, bias_data)
+            
+            # Debug: Print MAC unit bias loading
+            if mac_load_bias_h is not None and mac_load_bias_h.value:
+                if mac_bias_in_h is not None:
+                    bias_in = int(mac_bias_in_h.value)
+                    # Also get current output channel being computed
+                    if out_ch_h is not None:
+                        out_ch = int(out_ch_h.value)
+                        log.debug("MAC load bias for output %d: bias_in=%d", out_ch, bias_in)
+                    else:
+                        log.debug("MAC load bias: bias_in=%d", bias_in)
                 else:
-                    print(f"*** MAC load bias: bias_in={bias_in} ***")
-            else:
-                print(f"*** MAC load bias signal asserted ***")
+                    log.debug("MAC load bias signal asserted")
         
         if dut.output_ready.value:
             channel = int(dut.output_channel.value)
-            data = int(dut.output_data.value)
+            data = dut.output_data.value.signed_integer
             outputs[channel] = data
+            seen |= 1 << channel
             print(f"*** Received output for channel {channel}: {data} ***")
     
     print(f"*** Computation completed at cycle {cycle_count} ***")
     
     # Calculate expected outputs with bias values from hex file
-    expected_outputs = {}
-    for i in range(len(weight_matrix)):
-        dot_product = sum(input_vector[j] * weight_matrix[i][j] for j in range(len(input_vector)))
-        expected_outputs[i] = dot_product + bias_vector[i]
+    iv = np.array(input_vector, dtype=np.int32)
+    wm = np.array(weight_matrix, dtype=np.int32)
+    bv = np.array(bias_vector, dtype=np.int32)
+    expected_outputs = wm @ iv + bv
     
     # Verify outputs
-    for i in range(len(weight_matrix)):
-        actual_output = outputs.get(i, None)
-        expected_output = expected_outputs[i]
-        print(f"Output {i}: Expected {expected_output}, Got {actual_output}")
-        assert actual_output is not None, f"Missing output for channel {i}"
-        assert actual_output == expected_output, f"Output {i} mismatch: expected {expected_output}, got {actual_output}"
+    print(f"Outputs: Expected {expected_outputs.tolist()}, Got {outputs.tolist()}")
+    missing = [ch for ch in range(num_outputs) if not seen >> ch & 1]
+    assert not missing, f"Missing output for channels {missing}"
+    np.testing.assert_array_equal(outputs, expected_outputs, err_msg="Output mismatch")
     
     print("✅ Basic harness test passed!")
 
@@ -206,23 +240,28 @@ async def test_dense_layer_harness_memory_timing(dut):
     await RisingEdge(dut.clk)
     dut.start_compute.value = 0
     
-    # Wait for outputs and collect results
-    outputs = {}
+    # Wait for outputs and collect results; seen has bit c set once channel c has reported
+    outputs = np.full(len(weight_matrix), np.iinfo(np.int32).min, dtype=np.int32)
+    seen = 0
     cycle_count = 0
     max_cycles = 30
     
+    clk_edge = RisingEdge(dut.clk)  # one trigger object reused for every polled cycle
+    read_only = ReadOnly()  # sample each cycle once its values have settled; the loop only reads
     while not dut.computation_complete.value and cycle_count < max_cycles:
-        await RisingEdge(dut.clk)
+        await clk_edge
+        await read_only
         cycle_count += 1
         
         if dut.output_ready.value:
             channel = int(dut.output_channel.value)
-            data = int(dut.output_data.value)
+            data = dut.output_data.value.signed_integer
             outputs[channel] = data
+            seen |= 1 << channel
             print(f"Output {channel}: {data}")
     
     # Verify expected outputs with bias values
-    assert outputs[0] == 15, f"Output 0: expected 15, got {outputs[0]}"
-    assert outputs[1] == 31, f"Output 1: expected 31, got {outputs[1]}"
+    assert seen == (1 << len(weight_matrix)) - 1, f"Missing outputs: seen mask {seen:#b}"
+    np.testing.assert_array_equal(outputs, [15, 31], err_msg="Output mismatch")
     
     print("✅ Memory timing test passed!") 
\ No newline at end of file
@@ -1,8 +1,20 @@
 import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import RisingEdge, Timer
+from cocotb.triggers import ClockCycles, RisingEdge, Edge, First, ReadOnly, Timer
+from cocotb.utils import get_sim_time
 from cocotb.binary import BinaryValue
 import numpy as np
+import logging
+
+async def wait_for_loading(loading_done, max_cycles=200):
+    """Sleep until loading_done rises (or max_cycles 10ns clocks pass), settling in the timestep it rose in; returns ns waited"""
+    start = get_sim_time(units="ns")
+    if not loading_done.value:
+        window = Timer(max_cycles * 10, units="ns")
+        if await First(Edge(loading_done), window) is not window:
+            # Verilator updates the flag in the clock edge's timestep, where the polling loop saw it too
+            await ReadOnly()
+    return get_sim_time(units="ns") - start
 
 @cocotb.test()
 async def test_endianness_debug(dut):
@@ -14,8 +26,7 @@ async def test_endianness_debug(dut):
     
     # Reset
     dut.reset.value = 1
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
+    await ClockCycles(dut.clk, 2)
     dut.reset.value = 0
     await RisingEdge(dut.clk)
     
@@ -49,49 +60,56 @@ async def test_endianness_debug(dut):
     await RisingEdge(dut.clk)
     dut.start_extraction.value = 0
     
-    # Wait a few cycles for the first RAM read to happen
-    for i in range(10):
-        await RisingEdge(dut.clk)
+    # Per-read RAM dumps are built and logged only when DEBUG logging is enabled (e.g. COCOTB_LOG_LEVEL=DEBUG)
+    log = cocotb.log
+    debug_enabled = log.isEnabledFor(logging.DEBUG)
+    
+    # Resolve the polled handles and the edge trigger once, outside the loops
+    rising = RisingEdge(dut.clk)
+    ram_re = dut.ram_re
+    loading_done = dut.buffer_loading_complete
+    
+    # Wait a few cycles (10 clocks) for the first RAM read to happen; sleep on ram_re instead of
+    # waking every cycle. Verilator changes ram_re in the clock edge's timestep, so sample it once
+    # that timestep settles rather than on a later edge, which would miss a one-cycle pulse
+    deadline = get_sim_time(units="ns") + 10 * 10
+    while get_sim_time(units="ns") < deadline:
+        if ram_re.value:
+            await rising
+        else:
+            window = Timer(deadline - get_sim_time(units="ns"), units="ns")
+            if await First(Edge(ram_re), window) is window:
+                break
+        await ReadOnly()
         
         # Check if RAM is being read
-        if dut.ram_re.value:
+        if ram_re.value:
             ram_addr = int(dut.ram_addr_truncated.value)
-            cocotb.log.info(f"RAM read at address {ram_addr}")
             
             # Wait one more cycle for data to be available
-            await RisingEdge(dut.clk)
-            
-            # Read the outputs
-            full_data = int(dut.ram_dout.value)
-            dout0 = int(dut.ram_dout0.value)
-            dout1 = int(dut.ram_dout1.value)
-            dout2 = int(dut.ram_dout2.value)
-            dout3 = int(dut.ram_dout3.value)
-            
-            cocotb.log.info(f"RAM address {ram_addr}:")
-            cocotb.log.info(f"  Full 128-bit data: 0x{full_data:032x}")
-            cocotb.log.info(f"  dout0 (bytes 3:0):  0x{dout0:08x}")
-            cocotb.log.info(f"  dout1 (bytes 7:4):  0x{dout1:08x}")
-            cocotb.log.info(f"  dout2 (bytes 11:8): 0x{dout2:08x}")
-            cocotb.log.info(f"  dout3 (bytes 15:12): 0x{dout3:08x}")
+            await rising
             
-            # Extract individual bytes from each dout
-            for j, dout_val in enumerate([dout0, dout1, dout2, dout3]):
-                byte0 = dout_val & 0xFF
-                byte1 = (dout_val >> 8) & 0xFF
-                byte2 = (dout_val >> 16) & 0xFF
-                byte3 = (dout_val >> 24) & 0xFF
-                base_byte_idx = j * 4
-                cocotb.log.info(f"  dout{j} bytes: [{base_byte_idx}]={byte0}, [{base_byte_idx+1}]={byte1}, [{base_byte_idx+2}]={byte2}, [{base_byte_idx+3}]={byte3}")
+            if debug_enabled:
+                # Read the outputs
+                full_data = int(dut.ram_dout.value)
+                douts = [int(dut.ram_dout0.value), int(dut.ram_dout1.value),
+                         int(dut.ram_dout2.value), int(dut.ram_dout3.value)]
+                
+                # Byte views: the 128-bit line little-endian, and dout0..3 laid out as bytes [0-3], [4-7], ...
+                full_bytes = np.frombuffer(full_data.to_bytes(16, 'little'), dtype=np.uint8)
+                dout_bytes = np.array(douts, dtype='<u4').view(np.uint8)
+                
+                # One message per read: the full line, the four 32-bit douts and both byte views
+                log.debug("RAM read at address %d:\n  Full 128-bit data: 0x%032x\n  dout0..3 (bytes 3:0 .. 15:12): %s"
+                          "\n  Full data bytes [0-15]: %s\n  dout bytes [0-15]:      %s",
+                          ram_addr, full_data, " ".join(f"0x{d:08x}" for d in douts),
+                          full_bytes.tolist(), dout_bytes.tolist())
             
             if ram_addr >= 1:  # Stop after we've seen address 1
                 break
     
-    # Wait for buffer loading to complete
-    cycle_count = 0
-    while not dut.buffer_loading_complete.value and cycle_count < 200:
-        await RisingEdge(dut.clk)
-        cycle_count += 1
+    # Wait for buffer loading to complete (up to 200 cycles), waking only when the flag changes
+    await wait_for_loading(loading_done)
     
     await RisingEdge(dut.clk)
     
@@ -135,12 +153,8 @@ async def test_endianness_debug(dut):
     cocotb.log.info(f"After advancement - Channel group: {new_channel_group}/{total_channel_groups}")
     
     # Wait for buffer loading to complete for channel group 1
-    cycle_count = 0
-    while not dut.buffer_loading_complete.value and cycle_count < 200:
-        await RisingEdge(dut.clk)
-        cycle_count += 1
-        if cycle_count % 20 == 0:
-            cocotb.log.info(f"Waiting for channel group 1 loading... cycle {cycle_count}")
+    waited_ns = await wait_for_loading(loading_done)
+    cocotb.log.info(f"Channel group 1 loading waited {waited_ns / 10:.0f} cycles")
     
     await RisingEdge(dut.clk)
     
@@ -1,39 +1,61 @@
 import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import RisingEdge, Timer
+from cocotb.triggers import ClockCycles, RisingEdge, Edge, First, Timer
+from cocotb.utils import get_sim_time
 import numpy as np
-import random
+import os
+
+# Seed for the per-test operand generators
+SEED = 0xC0C07B
+
+# Set when the toplevel is built with make HDL_CLOCK=1 and toggles clk itself
+HDL_CLOCK = os.environ.get("HDL_CLOCK", "0") == "1"
+
+def start_clock(dut):
+    """Start the 10ns testbench clock, unless clk is generated on the HDL side"""
+    if not HDL_CLOCK:
+        cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+
+def read_probabilities(handle, packed=None, n=10):
+    """Read n 8-bit class probabilities: in one access from a packed bus (element 0 in the LSBs) when given, else element by element through the array value"""
+    if packed is not None:
+        val = packed.value.integer
+        return [(val >> (8 * i)) & 0xFF for i in range(n)]
+    return [int(v) for v in handle.value][:n]
+
+def read_flattened_bytes(flatten_inst, n):
+    """Read flattened_vector as n raw bytes: in one access via the packed flattened_vector_packed view when present, else element by element"""
+    if hasattr(flatten_inst, 'flattened_vector_packed'):
+        return flatten_inst.flattened_vector_packed.value.integer.to_bytes(n, 'little')
+    return bytes(int(v) & 0xFF for v in flatten_inst.flattened_vector.value)[:n]
 
 @cocotb.test()
 async def test_final_layers_integration(dut):
     """Test the complete final layers pipeline"""
     
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
+    # Start clock (unless the HDL side generates it)
+    start_clock(dut)
     
     # Reset
     dut.reset.value = 1
     dut.start_processing.value = 0
     dut.input_valid.value = 0
     
-    # Initialize inputs
-    for i in range(64):  # INPUT_CHANNELS
-        dut.input_features[i].value = 0
+    # Initialize inputs (one list assignment across all INPUT_CHANNELS)
+    dut.input_features.value = [0] * 64
     
     dut.input_row.value = 0
     dut.input_col.value = 0
     
     # Initialize dense weights and bias (simplified for testing)
-    for i in range(256):  # FLATTENED_SIZE
-        for j in range(10):  # DENSE_OUTPUT_SIZE
-            dut.dense_weights[i][j].value = random.randint(-10, 10)
-    
-    for i in range(10):
-        dut.dense_bias[i].value = random.randint(-5, 5)
+    # FLATTENED_SIZE x DENSE_OUTPUT_SIZE weights in [-10, 10], written as one nested-list assignment
+    rng = np.random.default_rng(SEED)  # PCG64, reseeded per test so runs are reproducible
+    dense_weights = rng.integers(-10, 11, size=(256, 10), dtype=np.int8)
+    dense_bias = rng.integers(-5, 6, size=10, dtype=np.int8)
+    dut.dense_weights.value = dense_weights.tolist()
+    dut.dense_bias.value = dense_bias.tolist()
     
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
+    await ClockCycles(dut.clk, 2)
     
     # Release reset
     dut.reset.value = 0
@@ -42,7 +64,12 @@ async def test_final_layers_integration(dut):
     print("=== Testing Final Layers Integration ===")
     
     # Generate test input data (2x2x64 feature map)
-    test_features = np.random.randint(-50, 50, size=(2, 2, 64), dtype=np.int8)
+    test_features = rng.integers(-50, 50, size=(2, 2, 64), dtype=np.int8)
+    
+    # Reference int32 dense logits for the flattened (row, col, channel) feature map, printed for debugging;
+    # the softmax sees them only after they are narrowed to int8, which isn't modelled here
+    reference_logits = test_features.flatten().astype(np.int32) @ dense_weights + dense_bias
+    print(f"Reference logits: {reference_logits}")
     
     print(f"Input feature map shape: {test_features.shape}")
     print(f"Sample input values: {test_features[0, 0, :5]}")
@@ -59,9 +86,8 @@ async def test_final_layers_integration(dut):
             dut.input_col.value = col
             dut.input_valid.value = 1
             
-            # Set channel data for this spatial position
-            for c in range(64):
-                dut.input_features[c].value = int(test_features[row, col, c])
+            # Set channel data for this spatial position (all 64 channels in one write)
+            dut.input_features.value = test_features[row, col].tolist()
             
             await RisingEdge(dut.clk)
             print(f"Fed spatial position ({row}, {col}) with channels: {test_features[row, col, :5]}...")
@@ -73,13 +99,20 @@ async def test_final_layers_integration(dut):
     timeout_cycles = 1000
     cycle_count = 0
     
-    while not dut.processing_complete.value and cycle_count < timeout_cycles:
-        await RisingEdge(dut.clk)
+    # Resolve the polled handle and the edge trigger once, outside the loop
+    proc_done = dut.processing_complete
+    rising = RisingEdge(dut.clk)
+    progress = []  # progress notes, printed once after the loop
+    while not proc_done.value and cycle_count < timeout_cycles:
+        await rising
         cycle_count += 1
         
         # Monitor state progression
         if cycle_count % 50 == 0:
-            print(f"Cycle {cycle_count}: Still processing...")
+            progress.append(f"Cycle {cycle_count}: Still processing...")
+    
+    if progress:
+        print("\n".join(progress))
     
     if cycle_count >= timeout_cycles:
         print("ERROR: Processing timed out!")
@@ -92,10 +125,7 @@ async def test_final_layers_integration(dut):
     assert dut.output_valid.value == 1, "Output should be valid"
     
     # Read classification results
-    probabilities = []
-    for i in range(10):
-        prob = int(dut.class_probabilities[i].value)
-        probabilities.append(prob)
+    probabilities = read_probabilities(dut.class_probabilities, getattr(dut, 'class_probabilities_packed', None))
     
     predicted_class = int(dut.predicted_class.value)
     
@@ -116,9 +146,8 @@ async def test_final_layers_integration(dut):
 async def test_flatten_stage_detailed(dut):
     """Test the flatten stage in detail"""
     
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
+    # Start clock (unless the HDL side generates it)
+    start_clock(dut)
     
     # Reset
     dut.reset.value = 1
@@ -142,28 +171,31 @@ async def test_flatten_stage_detailed(dut):
             dut.input_col.value = col
             dut.input_valid.value = 1
             
-            for c in range(64):
-                dut.input_features[c].value = int(test_pattern[row, col, c])
+            dut.input_features.value = test_pattern[row, col].tolist()
             
             await RisingEdge(dut.clk)
     
     dut.input_valid.value = 0
     
     # Wait for flatten to complete
-    while not dut.flatten_inst.flatten_complete.value:
-        await RisingEdge(dut.clk)
+    flatten_done = dut.flatten_inst.flatten_complete
+    rising = RisingEdge(dut.clk)
+    while not flatten_done.value:
+        await rising
     
     print("Flatten stage completed")
     
-    # Verify flattened vector
-    flattened_expected = test_pattern.flatten()
+    # Verify the whole flattened vector as raw two's complement bytes (element 0 first)
+    expected_bytes = test_pattern.flatten().astype(np.int8).tobytes()
+    actual_bytes = read_flattened_bytes(dut.flatten_inst, len(expected_bytes))
     
-    # Check a few sample values
-    for i in range(0, 256, 32):  # Sample every 32nd element
-        actual = int(dut.flatten_inst.flattened_vector[i].value)
-        expected = int(flattened_expected[i])
-        print(f"Index {i}: expected {expected}, got {actual}")
-        assert actual == expected, f"Mismatch at index {i}"
+    if actual_bytes != expected_bytes:
+        expected = np.frombuffer(expected_bytes, dtype=np.int8)
+        actual = np.frombuffer(actual_bytes, dtype=np.int8)
+        mismatches = np.flatnonzero(actual != expected)
+        for i in mismatches[:8]:
+            print(f"Index {i}: expected {expected[i]}, got {actual[i]}")
+        assert False, f"Flattened vector mismatch at {mismatches.size} indices, first at index {mismatches[0]}"
     
     print("✓ Flatten stage test passed!")
 
@@ -171,9 +203,8 @@ async def test_flatten_stage_detailed(dut):
 async def test_softmax_functionality(dut):
     """Test softmax functionality with known inputs"""
     
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
+    # Start clock (unless the HDL side generates it)
+    start_clock(dut)
     
     # Reset
     dut.reset.value = 1
@@ -185,26 +216,28 @@ async def test_softmax_functionality(dut):
     # Test with known logits that should produce clear winner
     test_logits = [-10, -5, 20, -8, -12, -15, -3, -7, -9, -11]  # Class 2 should win
     
-    # Set up softmax unit directly
-    dut.softmax_inst.start_softmax.value = 1
-    dut.softmax_inst.input_valid.value = 1
-    
-    for i in range(10):
-        dut.softmax_inst.input_logits[i].value = test_logits[i]
+    # Set up softmax unit directly: logits in one write, both handshake flags in the same cycle
+    softmax = dut.softmax_inst
+    if hasattr(softmax, 'input_logits_packed'):
+        # Packed bus with logit 0 in the LSBs: the little-endian int8 bytes line up directly
+        softmax.input_logits_packed.value = int.from_bytes(np.array(test_logits, dtype=np.int8).tobytes(), 'little')
+    else:
+        softmax.input_logits.value = test_logits
+    softmax.start_softmax.value = 1
+    softmax.input_valid.value = 1
     
     await RisingEdge(dut.clk)
-    dut.softmax_inst.start_softmax.value = 0
-    dut.softmax_inst.input_valid.value = 0
+    softmax.start_softmax.value = 0
+    softmax.input_valid.value = 0
     
     # Wait for softmax to complete
-    while not dut.softmax_inst.softmax_complete.value:
-        await RisingEdge(dut.clk)
+    softmax_done = dut.softmax_inst.softmax_complete
+    rising = RisingEdge(dut.clk)
+    while not softmax_done.value:
+        await rising
     
     # Read results
-    probabilities = []
-    for i in range(10):
-        prob = int(dut.softmax_inst.output_probs[i].value)
-        probabilities.append(prob)
+    probabilities = read_probabilities(dut.softmax_inst.output_probs)
     
     print(f"Input logits: {test_logits}")
     print(f"Output probabilities: {probabilities}")
@@ -224,9 +257,8 @@ async def test_softmax_functionality(dut):
 async def test_pipeline_stages(dut):
     """Test that pipeline stages execute in correct order"""
     
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
+    # Start clock (unless the HDL side generates it)
+    start_clock(dut)
     
     # Reset
     dut.reset.value = 1
@@ -236,8 +268,7 @@ async def test_pipeline_stages(dut):
     print("=== Testing Pipeline Stage Progression ===")
     
     # Initialize with simple data
-    for i in range(64):
-        dut.input_features[i].value = i % 128
+    dut.input_features.value = [i % 128 for i in range(64)]
     
     # Start processing
     dut.start_processing.value = 1
@@ -254,25 +285,34 @@ async def test_pipeline_stages(dut):
     
     dut.input_valid.value = 0
     
-    # Monitor state transitions
+    # Monitor state transitions: sleep until current_state or processing_complete changes
+    # rather than sampling every cycle, giving up after the original 500-cycle window
     states = []
-    prev_state = None
-    
-    for cycle in range(500):
-        await RisingEdge(dut.clk)
-        
-        # Read current state (assuming we can access it)
-        current_state = int(dut.current_state.value)
-        
-        if current_state != prev_state:
-            state_names = ["IDLE", "FLATTEN_STAGE", "DENSE_COMPUTE", "RELU_STAGE", "SOFTMAX_STAGE", "COMPLETE"]
-            if current_state < len(state_names):
-                print(f"Cycle {cycle}: State changed to {state_names[current_state]}")
-                states.append(current_state)
-            prev_state = current_state
-        
-        if dut.processing_complete.value:
+    transitions = []  # state change notes, printed once after the loop
+    state_names = ["IDLE", "FLATTEN_STAGE", "DENSE_COMPUTE", "RELU_STAGE", "SOFTMAX_STAGE", "COMPLETE"]
+    
+    state_h = dut.current_state
+    proc_done = dut.processing_complete
+    start_ns = get_sim_time(units="ns")
+    deadline = start_ns + 500 * 10
+    
+    def record_state():
+        """Append the current state if it differs from the last one recorded (an Edge on processing_complete alone leaves it unchanged)"""
+        current_state = int(state_h.value)
+        if current_state < len(state_names) and (not states or current_state != states[-1]):
+            cycle = int(get_sim_time(units="ns") - start_ns) // 10
+            transitions.append(f"Cycle {cycle}: State changed to {state_names[current_state]}")
+            states.append(current_state)
+    
+    record_state()
+    while not proc_done.value and get_sim_time(units="ns") < deadline:
+        window = Timer(deadline - get_sim_time(units="ns"), units="ns")
+        if await First(Edge(state_h), Edge(proc_done), window) is window:
             break
+        record_state()
+    record_state()  # catch a final transition that landed with processing_complete
+    
+    print("\n".join(transitions))
     
     # Verify state progression
     expected_sequence = [0, 1, 2, 3, 4, 5]  # IDLE -> FLATTEN -> DENSE -> RELU -> SOFTMAX -> COMPLETE
@@ -289,9 +329,8 @@ async def test_pipeline_stages(dut):
 async def test_final_layers_basic(dut):
     """Basic test of final layers integration"""
     
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
+    # Start clock (unless the HDL side generates it)
+    start_clock(dut)
     
     # Reset
     dut.reset.value = 1
@@ -305,8 +344,7 @@ async def test_final_layers_basic(dut):
     print("=== Testing Final Layers Integration ===")
     
     # Initialize simple test data
-    for i in range(64):
-        dut.input_features[i].value = i % 100
+    dut.input_features.value = [i % 100 for i in range(64)]
     
     # Start processing
     dut.start_processing.value = 1
@@ -327,8 +365,10 @@ async def test_final_layers_basic(dut):
     timeout = 1000
     cycles = 0
     
-    while not dut.processing_complete.value and cycles < timeout:
-        await RisingEdge(dut.clk)
+    proc_done = dut.processing_complete
+    rising = RisingEdge(dut.clk)
+    while not proc_done.value and cycles < timeout:
+        await rising
         cycles += 1
     
     print(f"Processing completed in {cycles} cycles")
@@ -1,23 +1,66 @@
 import cocotb
+import logging
 from cocotb.clock import Clock
-from cocotb.triggers import RisingEdge, Timer
+from cocotb.triggers import RisingEdge, FallingEdge, ReadOnly, First, Timer
+from cocotb.utils import get_sim_time
 from cocotb.binary import BinaryValue
 import numpy as np
+from array import array
+from collections import Counter
+
+CLOCK_PERIOD_NS = 10
+MAX_LOADING_CYCLES = 200
+
+async def wait_for_loading(dut, on_read, max_cycles=MAX_LOADING_CYCLES):
+    """Wait for buffer_loading_complete, calling on_read(addr, cycle) on every cycle the unified buffer's ram_re is high; returns the cycle count"""
+    # Cached handles; values are sampled in the read-only phase after each edge, once they have settled
+    ram_re = dut.unified_buffer_inst.ram_re
+    ram_addr = dut.unified_buffer_inst.ram_addr
+    done = dut.buffer_loading_complete
+    clk_edge = RisingEdge(dut.clk)
+    read_edge = RisingEdge(ram_re)
+    done_edge = RisingEdge(done)
+    read_only = ReadOnly()
+    
+    start = get_sim_time(units="ns")
+    deadline = start + (max_cycles + 1) * CLOCK_PERIOD_NS
+    
+    await clk_edge
+    await read_only
+    while True:
+        cycle = -(-int(get_sim_time(units="ns") - start) // CLOCK_PERIOD_NS)
+        if ram_re.value:
+            on_read(int(ram_addr.value), cycle)
+        if done.value or cycle > max_cycles:
+            break
+        
+        if ram_re.value:
+            # Back-to-back reads: every cycle carries a new address
+            await clk_edge
+        else:
+            # Nothing to record until a read starts or loading completes; sleep instead of waking every clock
+            await First(read_edge, done_edge, Timer(deadline - get_sim_time(units="ns"), units="ns"))
+        await read_only
+    
+    # Leave the read-only phase; writes made by the caller are sampled on the next rising edge
+    await FallingEdge(dut.clk)
+    return cycle
 
 @cocotb.test()
 async def test_full_tensor_traverse(dut):
     """Complete tensor traversal with full memory trace"""
     
     # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
+    clock = Clock(dut.clk, CLOCK_PERIOD_NS, units="ns")
     cocotb.start_soon(clock.start())
+    clk_edge = RisingEdge(dut.clk)
     
     # Reset
     dut.reset.value = 1
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
+    await clk_edge
+    await clk_edge
     dut.reset.value = 0
-    await RisingEdge(dut.clk)
+    await clk_edge
     
     # Configure for 16x16x8 image
     img_width = 16
@@ -32,6 +75,11 @@ async def test_full_tensor_traverse(dut):
     dut.pad_left.value = 0
     dut.pad_right.value = 0
     
+    # Handles read on every RAM access, resolved once
+    d0, d1, d2, d3 = dut.ram_dout0, dut.ram_dout1, dut.ram_dout2, dut.ram_dout3
+    patch_pe00_out = dut.patch_pe00_out
+    trace_reads = cocotb.log.isEnabledFor(logging.DEBUG)
+    
     cocotb.log.info("=== FULL TENSOR TRAVERSAL TRACE ===")
     cocotb.log.info(f"Image dimensions: {img_width}x{img_height}x{num_channels}")
     cocotb.log.info(f"Total spatial positions: {img_width * img_height}")
@@ -41,12 +89,24 @@ async def test_full_tensor_traverse(dut):
     
     # Start extraction
     dut.start_extraction.value = 1
-    await RisingEdge(dut.clk)
+    await clk_edge
     dut.start_extraction.value = 0
     
     spatial_block_count = 0
     total_channel_groups_processed = 0
-    all_ram_accesses = []
+    
+    # RAM access trace as parallel arrays, one slot per possible read (at most one per loading cycle)
+    max_accesses = (img_width // 4) * (img_height // 4) * 2 * (MAX_LOADING_CYCLES + 1)
+    blk_arr = np.empty(max_accesses, dtype=np.int32)
+    cg_arr = np.empty(max_accesses, dtype=np.int32)
+    addr_arr = np.empty(max_accesses, dtype=np.int32)
+    cyc_arr = np.empty(max_accesses, dtype=np.int32)
+    n = 0
+    
+    # Expected bytes of every (pixel, channel group, lane): the test image holds byte (pixel*channels + channel) % 256
+    expected_table = ((np.arange(img_height * img_width)[:, None, None] * num_channels
+                       + np.arange((num_channels + 3) // 4)[None, :, None] * 4
+                       + np.arange(4)[None, None, :]) % 256).astype(np.uint8)
     
     # Track all spatial blocks
     for block_row in range(0, img_height, 4):  # 4x4 blocks
@@ -61,71 +121,45 @@ async def test_full_tensor_traverse(dut):
                 
                 cocotb.log.info(f"--- Channel Group {channel_group} (channels {channel_group*4}-{channel_group*4+3}) ---")
                 
-                # Wait for loading to complete
-                loading_cycles = 0
-                ram_addresses_this_group = []
+                # Wait for loading to complete; this group's reads land in addr_arr[group_start:n]
+                group_start = n
                 
-                while True:
-                    await RisingEdge(dut.clk)
-                    loading_cycles += 1
-                    
+                def record_read(addr, cycle):
+                    nonlocal n
                     # Track RAM accesses through unified buffer instance
-                    if dut.unified_buffer_inst.ram_re.value == 1:
-                        addr = int(dut.unified_buffer_inst.ram_addr.value)
-                        ram_addresses_this_group.append(addr)
-                        all_ram_accesses.append({
-                            'spatial_block': spatial_block_count,
-                            'channel_group': channel_group,
-                            'address': addr,
-                            'cycle': loading_cycles
-                        })
-                        
-                        # Log detailed RAM access
-                        ram_data = {
-                            'dout0': int(dut.ram_dout0.value),
-                            'dout1': int(dut.ram_dout1.value), 
-                            'dout2': int(dut.ram_dout2.value),
-                            'dout3': int(dut.ram_dout3.value)
-                        }
-                        
-                        cocotb.log.info(f"  Cycle {loading_cycles:3d}: RAM[{addr:3d}] = "
-                                      f"dout3:0x{ram_data['dout3']:08x} "
-                                      f"dout2:0x{ram_data['dout2']:08x} "
-                                      f"dout1:0x{ram_data['dout1']:08x} "
-                                      f"dout0:0x{ram_data['dout0']:08x}")
+                    blk_arr[n] = spatial_block_count
+                    cg_arr[n] = channel_group
+                    addr_arr[n] = addr
+                    cyc_arr[n] = cycle
+                    n += 1
                     
-                    # Check if loading is complete
-                    if dut.buffer_loading_complete.value == 1:
-                        break
-                        
-                    # Safety timeout
-                    if loading_cycles > 200:
-                        cocotb.log.error(f"Timeout waiting for channel group {channel_group} loading")
-                        break
+                    # Log detailed RAM access; the dout reads and formatting only happen when debug is on
+                    if trace_reads:
+                        cocotb.log.debug("  Cycle %3d: RAM[%3d] = dout3:0x%08x dout2:0x%08x dout1:0x%08x dout0:0x%08x",
+                                         cycle, addr, int(d3.value), int(d2.value), int(d1.value), int(d0.value))
+                
+                loading_cycles = await wait_for_loading(dut, record_read)
+                
+                # Safety timeout
+                if loading_cycles > MAX_LOADING_CYCLES:
+                    cocotb.log.error(f"Timeout waiting for channel group {channel_group} loading")
                 
                 cocotb.log.info(f"  Loading completed in {loading_cycles} cycles")
-                cocotb.log.info(f"  RAM addresses accessed: {len(ram_addresses_this_group)} unique addresses")
-                cocotb.log.info(f"  Address range: {min(ram_addresses_this_group) if ram_addresses_this_group else 'N/A'} - {max(ram_addresses_this_group) if ram_addresses_this_group else 'N/A'}")
+                group_addresses = addr_arr[group_start:n]
+                cocotb.log.info(f"  RAM addresses accessed: {group_addresses.size} unique addresses")
+                cocotb.log.info(f"  Address range: {group_addresses.min() if group_addresses.size else 'N/A'} - {group_addresses.max() if group_addresses.size else 'N/A'}")
                 
                 # Check extracted data at position (0,0)
-                patch_data = int(dut.patch_pe00_out.value)
-                channels = [
-                    (patch_data >> 0) & 0xFF,
-                    (patch_data >> 8) & 0xFF,
-                    (patch_data >> 16) & 0xFF,
-                    (patch_data >> 24) & 0xFF
-                ]
+                # Channel 0 sits in the least significant byte
+                channels = list(patch_pe00_out.value.integer.to_bytes(4, 'little'))
                 cocotb.log.info(f"  Extracted channels at (0,0): {channels}")
                 
                 # Calculate expected channels for this position
                 pixel_index = block_row * img_width + block_col
-                expected_channels = [
-                    (pixel_index * 8 + channel_group * 4 + i) % 256 
-                    for i in range(4)
-                ]
-                cocotb.log.info(f"  Expected channels at (0,0): {expected_channels}")
+                expected_channels = expected_table[pixel_index, channel_group]
+                cocotb.log.info(f"  Expected channels at (0,0): {expected_channels.tolist()}")
                 
-                if channels == expected_channels:
+                if np.array_equal(channels, expected_channels):
                     cocotb.log.info(f"  ✓ Channel group {channel_group} data correct!")
                 else:
                     cocotb.log.error(f"  ✗ Channel group {channel_group} data mismatch!")
@@ -133,22 +167,22 @@ async def test_full_tensor_traverse(dut):
                 # Move to next channel group (except for last one)
                 if channel_group == 0:
                     dut.next_channel_group.value = 1
-                    await RisingEdge(dut.clk)
+                    await clk_edge
                     dut.next_channel_group.value = 0
                     
                     # Wait for transition
-                    await RisingEdge(dut.clk)
-                    await RisingEdge(dut.clk)
+                    await clk_edge
+                    await clk_edge
             
             # Move to next spatial block (except for last one)
             if not (block_row == img_height - 4 and block_col == img_width - 4):
                 dut.next_spatial_block.value = 1
-                await RisingEdge(dut.clk)
+                await clk_edge
                 dut.next_spatial_block.value = 0
                 
                 # Wait for transition
-                await RisingEdge(dut.clk)
-                await RisingEdge(dut.clk)
+                await clk_edge
+                await clk_edge
             
             cocotb.log.info("")
     
@@ -156,30 +190,30 @@ async def test_full_tensor_traverse(dut):
     cocotb.log.info("=== TRAVERSAL SUMMARY ===")
     cocotb.log.info(f"Total spatial blocks processed: {spatial_block_count}")
     cocotb.log.info(f"Total channel groups processed: {total_channel_groups_processed}")
-    cocotb.log.info(f"Total RAM accesses: {len(all_ram_accesses)}")
+    cocotb.log.info(f"Total RAM accesses: {n}")
     
     # Analyze RAM access patterns
-    unique_addresses = set(access['address'] for access in all_ram_accesses)
+    blk_arr, cg_arr, addr_arr, cyc_arr = blk_arr[:n], cg_arr[:n], addr_arr[:n], cyc_arr[:n]
+    unique_addresses = np.unique(addr_arr)
     cocotb.log.info(f"Unique RAM addresses accessed: {len(unique_addresses)}")
-    cocotb.log.info(f"Address range: {min(unique_addresses)} - {max(unique_addresses)}")
+    cocotb.log.info(f"Address range: {unique_addresses.min()} - {unique_addresses.max()}")
     
     # Group accesses by spatial block
     cocotb.log.info("")
     cocotb.log.info("=== RAM ACCESS PATTERN BY SPATIAL BLOCK ===")
     for block_num in range(1, spatial_block_count + 1):
-        block_accesses = [acc for acc in all_ram_accesses if acc['spatial_block'] == block_num]
-        block_addresses = [acc['address'] for acc in block_accesses]
+        in_block = blk_arr == block_num
         
         # Group by channel group
-        cg0_addresses = [acc['address'] for acc in block_accesses if acc['channel_group'] == 0]
-        cg1_addresses = [acc['address'] for acc in block_accesses if acc['channel_group'] == 1]
+        cg0_addresses = addr_arr[in_block & (cg_arr == 0)].tolist()
+        cg1_addresses = addr_arr[in_block & (cg_arr == 1)].tolist()
         
         cocotb.log.info(f"Block {block_num}:")
         cocotb.log.info(f"  Channel Group 0: {len(cg0_addresses)} accesses, addresses {cg0_addresses[:5]}{'...' if len(cg0_addresses) > 5 else ''}")
         cocotb.log.info(f"  Channel Group 1: {len(cg1_addresses)} accesses, addresses {cg1_addresses[:5]}{'...' if len(cg1_addresses) > 5 else ''}")
         
         # Check if both channel groups access same addresses
-        if set(cg0_addresses) == set(cg1_addresses):
+        if np.array_equal(np.unique(cg0_addresses), np.unique(cg1_addresses)):
             cocotb.log.info(f"  ✓ Both channel groups access same addresses")
         else:
             cocotb.log.info(f"  ✗ Channel groups access different addresses")
@@ -199,15 +233,11 @@ async def test_full_tensor_traverse(dut):
     # Address distribution analysis
     cocotb.log.info("")
     cocotb.log.info("=== ADDRESS DISTRIBUTION ===")
-    address_counts = {}
-    for access in all_ram_accesses:
-        addr = access['address']
-        address_counts[addr] = address_counts.get(addr, 0) + 1
+    address_counts = Counter(addr_arr.tolist())
     
     # Show most frequently accessed addresses
-    sorted_addresses = sorted(address_counts.items(), key=lambda x: x[1], reverse=True)
     cocotb.log.info("Most frequently accessed addresses:")
-    for addr, count in sorted_addresses[:10]:
+    for addr, count in address_counts.most_common(10):
         cocotb.log.info(f"  Address {addr}: accessed {count} times")
     
     cocotb.log.info("")
@@ -218,15 +248,16 @@ async def test_memory_reuse_analysis(dut):
     """Analyze memory reuse patterns across spatial blocks"""
     
     # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
+    clock = Clock(dut.clk, CLOCK_PERIOD_NS, units="ns")
     cocotb.start_soon(clock.start())
+    clk_edge = RisingEdge(dut.clk)
     
     # Reset
     dut.reset.value = 1
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
+    await clk_edge
+    await clk_edge
     dut.reset.value = 0
-    await RisingEdge(dut.clk)
+    await clk_edge
     
     # Configure for smaller image for detailed analysis
     img_width = 8
@@ -246,7 +277,7 @@ async def test_memory_reuse_analysis(dut):
     
     # Start extraction
     dut.start_extraction.value = 1
-    await RisingEdge(dut.clk)
+    await clk_edge
     dut.start_extraction.value = 0
     
     spatial_blocks = []
@@ -257,59 +288,55 @@ async def test_memory_reuse_analysis(dut):
             
             block_info = {
                 'position': (block_row, block_col),
-                'addresses': {'cg0': [], 'cg1': []}
+                'addresses': {'cg0': array('I'), 'cg1': array('I')}
             }
             
             # Process both channel groups
             for channel_group in range(2):
                 
                 # Wait for loading to complete
-                while True:
-                    await RisingEdge(dut.clk)
-                    
-                    if dut.unified_buffer_inst.ram_re.value == 1:
-                        addr = int(dut.unified_buffer_inst.ram_addr.value)
-                        cg_key = f'cg{channel_group}'
-                        block_info['addresses'][cg_key].append(addr)
-                    
-                    if dut.buffer_loading_complete.value == 1:
-                        break
+                addresses = block_info['addresses'][f'cg{channel_group}']
+                loading_cycles = await wait_for_loading(dut, lambda addr, cycle: addresses.append(addr))
+                if loading_cycles > MAX_LOADING_CYCLES:
+                    cocotb.log.error(f"Timeout waiting for channel group {channel_group} loading")
                 
                 # Move to next channel group
                 if channel_group == 0:
                     dut.next_channel_group.value = 1
-                    await RisingEdge(dut.clk)
+                    await clk_edge
                     dut.next_channel_group.value = 0
-                    await RisingEdge(dut.clk)
+                    await clk_edge
             
             spatial_blocks.append(block_info)
             
             # Move to next spatial block
             dut.next_spatial_block.value = 1
-            await RisingEdge(dut.clk)
+            await clk_edge
             dut.next_spatial_block.value = 0
-            await RisingEdge(dut.clk)
+            await clk_edge
     
     # Analyze overlaps between adjacent blocks
     cocotb.log.info("")
     cocotb.log.info("=== SPATIAL BLOCK OVERLAP ANALYSIS ===")
     
+    # Sorted unique channel group 0 addresses of each block
+    block_addresses = [np.unique(np.asarray(block['addresses']['cg0'], dtype=np.int32)) for block in spatial_blocks]
+    
     for i, block in enumerate(spatial_blocks):
         pos = block['position']
-        addresses = set(block['addresses']['cg0'])  # Use channel group 0 addresses
+        addresses = block_addresses[i]
         
         cocotb.log.info(f"Block {i+1} at {pos}:")
-        cocotb.log.info(f"  Addresses: {sorted(addresses)}")
+        cocotb.log.info(f"  Addresses: {addresses.tolist()}")
         
         # Check overlap with previous blocks
-        for j, prev_block in enumerate(spatial_blocks[:i]):
-            prev_addresses = set(prev_block['addresses']['cg0'])
-            overlap = addresses.intersection(prev_addresses)
+        for j, prev_addresses in enumerate(block_addresses[:i]):
+            overlap = np.intersect1d(addresses, prev_addresses, assume_unique=True)
             
-            if overlap:
-                overlap_percent = len(overlap) / len(addresses) * 100
-                cocotb.log.info(f"  Overlap with block {j+1}: {len(overlap)} addresses ({overlap_percent:.1f}%)")
-                cocotb.log.info(f"    Shared addresses: {sorted(overlap)}")
+            if overlap.size:
+                overlap_percent = overlap.size / addresses.size * 100
+                cocotb.log.info(f"  Overlap with block {j+1}: {overlap.size} addresses ({overlap_percent:.1f}%)")
+                cocotb.log.info(f"    Shared addresses: {overlap.tolist()}")
     
     cocotb.log.info("")
     cocotb.log.info("Memory reuse analysis completed!") 
\ No newline at end of file
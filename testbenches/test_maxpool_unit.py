@@ -2,87 +2,108 @@ import cocotb
 import logging
 from cocotb.clock      import Clock
 from cocotb.triggers   import RisingEdge
-import random
+from cocotb.regression import TestFactory
+import numpy as np
 
-@cocotb.test()
-async def test_maxpool_unit_streaming(dut):
-    """Drive rows and sample outputs each cycle to catch mid-input pooled values."""
-    SA_N     = len(dut.in_valid)
-    FILTER_H = int(dut.FILTER_H.value)
-    FILTER_W = int(dut.FILTER_W.value)
-    # number of pooled blocks = (SA_N/FILTER_H)*(SA_N/FILTER_W)
-    num_blocks = (SA_N // FILTER_H) * (SA_N // FILTER_W)
+# Number of randomized streaming tests; each is generated as its own test so "make -jN parallel" can run
+# them in separate simulator processes
+NUM_RANDOM_TESTS = 10
+
+def maxpool_shape(dut):
+    """Return (SA_N, FILTER_H, FILTER_W) of the DUT"""
+    return len(dut.in_valid), int(dut.FILTER_H.value), int(dut.FILTER_W.value)
 
-    # start clock
+async def start_maxpool(dut):
+    """Start the clock and reset the DUT"""
     cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
     dut._log.setLevel(logging.INFO)
+    await reset_dut(dut)
+
+async def reset_dut(dut):
+    dut.reset.value = 1
+    await RisingEdge(dut.clk)
+    dut.reset.value = 0
+    await RisingEdge(dut.clk)
+
+def compute_expected(dut, mat, base_r, base_c):
+    SA_N, FILTER_H, FILTER_W = maxpool_shape(dut)
+    nb_r = SA_N // FILTER_H
+    nb_c = SA_N // FILTER_W
+    # only the top-left SA_N x SA_N window is streamed; pool it as one reshape + max reduction
+    arr = np.asarray(mat, dtype=np.int32)[:nb_r*FILTER_H, :nb_c*FILTER_W]
+    pooled = arr.reshape(nb_r, FILTER_H, nb_c, FILTER_W).max(axis=(1, 3))
+    return [(base_r + br*FILTER_H, base_c + bc*FILTER_W, int(maxv))
+            for (br, bc), maxv in np.ndenumerate(pooled)]
+
+def lanes(values, width):
+    """Pack per-lane values into one bus word (lane 0 in the LSBs), or pass the list through when width is None"""
+    if width is None:
+        return list(values)
+    mask = (1 << width) - 1
+    word = 0
+    for ch, v in enumerate(values):
+        word |= (v & mask) << (ch * width)
+    return word
+
+async def drive_and_capture(dut, mat, base_r, base_c):
+    """Stream mat row by row and sample outputs each cycle to catch mid-input pooled values"""
+    SA_N, FILTER_H, FILTER_W = maxpool_shape(dut)
+    num_blocks = (SA_N // FILTER_H) * (SA_N // FILTER_W)
 
-    async def tick():
-        """Advance one clock."""
-        await RisingEdge(dut.clk)
-
-    async def reset_dut():
-        dut.reset.value = 1
-        await tick()
-        dut.reset.value = 0
-        await tick()
-
-    def compute_expected(mat, base_r, base_c):
-        out = []
-        nb_r = SA_N // FILTER_H
-        nb_c = SA_N // FILTER_W
-        for br in range(nb_r):
-            for bc in range(nb_c):
-                maxv = None
-                for pr in range(FILTER_H):
-                    for pc in range(FILTER_W):
-                        r = br*FILTER_H + pr
-                        c = bc*FILTER_W + pc
-                        v = mat[r][c]
-                        if maxv is None or v > maxv:
-                            maxv = v
-                out_r = base_r + br*FILTER_H
-                out_c = base_c + bc*FILTER_W
-                out.append((out_r, out_c, maxv))
-        return out
-
-    async def drive_and_capture(mat, base_r, base_c):
-        seen = []
-        # drive each row, sample outputs immediately
-        # deassert valids, then start
-        dut.pos_row.value = base_r
-        dut.pos_col.value = base_c
-        for ch in range(SA_N):
-            dut.in_valid[ch].value = 0
-        await tick()
-        for row in range(SA_N):
-            # assert valids with this row
-            for ch in range(SA_N):
-                dut.in_valid[ch].value = 1
-                dut.in_row[ch].value   = base_r + row
-                dut.in_col[ch].value   = base_c + ch
-                dut.in_data[ch].value  = mat[row][ch]
-            await tick()
-
-            # sample possible output
-            if dut.out_valid.value.integer:
-                seen.append((
-                    dut.out_row .value.integer,
-                    dut.out_col .value.integer,
-                    dut.out_data.value.signed_integer
-                ))
-        for ch in range(SA_N):
-             dut.in_valid[ch].value = 0
-        # flush remaining outputs
-        for _ in range(num_blocks):
-            await tick()
-            if dut.out_valid.value.integer:
-                seen.append((
-                    dut.out_row .value.integer,
-                    dut.out_col .value.integer,
-                    dut.out_data.value.signed_integer
-                ))
-        return seen
+    # maxpool_unit_tb exposes the lanes as packed buses; a bare maxpool_unit toplevel takes one list
+    # write per unpacked port instead (lane widths only matter when packing)
+    if hasattr(dut, 'in_data_flat'):
+        N_BITS = len(dut.in_row_flat) // SA_N
+        valid_w, data_w = 1, 8
+        in_row, in_col, in_data = dut.in_row_flat, dut.in_col_flat, dut.in_data_flat
+    else:
+        N_BITS = valid_w = data_w = None
+        in_row, in_col, in_data = dut.in_row, dut.in_col, dut.in_data
+    in_valid = dut.in_valid
+    clk_edge = RisingEdge(dut.clk)
+
+    seen = []
+    # drive each row, sample outputs immediately
+    # deassert valids, then start
+    dut.pos_row.value = base_r
+    dut.pos_col.value = base_c
+    all_valid = lanes([1] * SA_N, valid_w)
+    no_valid = lanes([0] * SA_N, valid_w)
+    cols = lanes([base_c + ch for ch in range(SA_N)], N_BITS)
+    in_valid.value = no_valid
+    await clk_edge
+    for row in range(SA_N):
+        # assert valids with this row: one write per port for all lanes
+        in_valid.value = all_valid
+        in_row.value   = lanes([base_r + row] * SA_N, N_BITS)
+        in_col.value   = cols
+        in_data.value  = lanes(mat[row][:SA_N], data_w)
+        await clk_edge
+
+        # sample possible output
+        if dut.out_valid.value.integer:
+            seen.append((
+                dut.out_row .value.integer,
+                dut.out_col .value.integer,
+                dut.out_data.value.signed_integer
+            ))
+    in_valid.value = no_valid
+    # flush remaining outputs
+    for _ in range(num_blocks):
+        await clk_edge
+        if dut.out_valid.value.integer:
+            seen.append((
+                dut.out_row .value.integer,
+                dut.out_col .value.integer,
+                dut.out_data.value.signed_integer
+            ))
+    return seen
+
+@cocotb.test()
+async def test_maxpool_unit_streaming(dut):
+    """Drive rows and sample outputs each cycle to catch mid-input pooled values."""
+    SA_N = len(dut.in_valid)
+    await start_maxpool(dut)
 
     # 1) Basic fixed‐matrix test
     dut._log.info("🚀 Basic fixed‐matrix streaming test")
@@ -92,35 +113,40 @@ async def test_maxpool_unit_streaming(dut):
         [-1,  0, -2, -3],
         [10, 12,  9, 11]
     ]
-    await reset_dut()
-    exp0 = compute_expected(mat0, 0, 0)
-    seen0 = await drive_and_capture(mat0, 0, 0)
+    exp0 = compute_expected(dut, mat0, 0, 0)
+    seen0 = await drive_and_capture(dut, mat0, 0, 0)
     assert seen0 == exp0, f"Mismatch: saw {seen0}, expected {exp0}"
     dut._log.info("✅ Basic test passed")
 
-    # 2) Randomized tests
-    dut._log.info("🚀 Randomized streaming tests")
-    for idx in range(10):
-        mat = [[random.randint(-128,127) for _ in range(SA_N)]
-               for _ in range(SA_N)]
-        await reset_dut()
-        rand_row = random.randint(0,511)
-        rand_col = random.randint(0,511)
-        exp = compute_expected(mat, rand_row, rand_col)
-        seen = await drive_and_capture(mat, rand_row, rand_col)
-        assert seen == exp, f"[rnd {idx}] saw {seen}, exp {exp}"
-        dut._log.info(f"✅ Random test {idx} passed")
+    # 2) Randomized tests run as the generated random_maxpool_stream_* tests below
 
     # 3) Offset base_row/base_col
     dut._log.info("🚀 Offset base_row/base_col streaming test")
     base_r, base_c = 2, 1
     size = SA_N + max(base_r, base_c)
-    matB = [[random.randint(-50,50) for _ in range(size)]
-            for _ in range(size)]
-    await reset_dut()
-    expB = compute_expected(matB, base_r, base_c)
-    seenB = await drive_and_capture(matB, base_r, base_c)
+    matB = np.random.default_rng().integers(-50, 51, size=(size, size)).tolist()
+    await reset_dut(dut)
+    expB = compute_expected(dut, matB, base_r, base_c)
+    seenB = await drive_and_capture(dut, matB, base_r, base_c)
     assert seenB == expB, f"Offset saw {seenB}, exp {expB}"
     dut._log.info("✅ Offset test passed")
 
     dut._log.info("✅ All streaming maxpool tests passed")
+
+async def random_maxpool_stream(dut, idx):
+    """Stream one random matrix at a random base position, seeded by idx"""
+    SA_N = len(dut.in_valid)
+    await start_maxpool(dut)
+
+    rng = np.random.default_rng(idx)
+    mat = rng.integers(-128, 128, size=(SA_N, SA_N)).tolist()
+    rand_row, rand_col = rng.integers(0, 512, size=2).tolist()
+    exp = compute_expected(dut, mat, rand_row, rand_col)
+    seen = await drive_and_capture(dut, mat, rand_row, rand_col)
+    assert seen == exp, f"[rnd {idx}] saw {seen}, exp {exp}"
+    dut._log.info(f"✅ Random test {idx} passed")
+
+# One generated test per random seed
+factory = TestFactory(random_maxpool_stream)
+factory.add_option("idx", range(NUM_RANDOM_TESTS))
+factory.generate_tests()
@@ -1,45 +1,25 @@
 import cocotb
-from cocotb.clock import Clock
-from cocotb.triggers import RisingEdge, Timer
+import logging
+from cocotb.triggers import Timer
 from cocotb.binary import BinaryValue
 import numpy as np
+import os
+from tb_common import init_dut
+
+# Log the first 4 channel group 0 RAM reads and then every LOG_EVERY-th one; 0 silences the per-read trace
+LOG_EVERY = int(os.environ.get('MEMTRV_LOG_EVERY', '8'))
 
 @cocotb.test()
 async def test_memory_traverse(dut):
     """Detailed trace traversing the whole memory to understand data layout"""
     
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
-    
-    # Reset
-    dut.reset.value = 1
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
-    
     # Configure for 16x16x8 image
     img_width = 16
     img_height = 16
     num_channels = 8
     
-    dut.img_width.value = img_width
-    dut.img_height.value = img_height
-    dut.num_channels.value = num_channels
-    dut.pad_top.value = 0
-    dut.pad_bottom.value = 0
-    dut.pad_left.value = 0
-    dut.pad_right.value = 0
-    
-    # Initialize control signals
-    dut.start_extraction.value = 0
-    dut.next_channel_group.value = 0
-    dut.next_spatial_block.value = 0
-    dut.start_formatting.value = 0
-    dut.tensor_ram_we.value = 0
-    
-    await RisingEdge(dut.clk)
+    # Clock, reset and image configuration
+    clk_edge = await init_dut(dut, img_w=img_width, img_h=img_height, channels=num_channels)
     
     cocotb.log.info("=== MEMORY LAYOUT ANALYSIS FOR 16x16x8 DATA ===")
     cocotb.log.info(f"Image dimensions: {img_width}x{img_height}x{num_channels}")
@@ -49,11 +29,8 @@ async def test_memory_traverse(dut):
     cocotb.log.info(f"Each RAM address contains 16 bytes = 2 pixels worth of data")
     cocotb.log.info(f"Total RAM addresses needed: {(img_width * img_height * num_channels) // 16} = {(img_width * img_height * num_channels) // 16}")
     
-    # Calculate expected data pattern
-    def get_expected_value(row, col, channel):
-        """Calculate expected value for position (row, col, channel)"""
-        base_idx = (row * img_width + col) * num_channels
-        return (base_idx + channel) % 256
+    # Expected data pattern: expected[row, col, channel] = ((row * width + col) * channels + channel) % 256
+    expected = (np.arange(img_height * img_width * num_channels) % 256).reshape(img_height, img_width, num_channels)
     
     def get_ram_address(row, col):
         """Calculate RAM address for spatial position (row, col)"""
@@ -64,6 +41,12 @@ async def test_memory_traverse(dut):
         pixel_in_line = (row * img_width + col) % 2  # 2 pixels per 16-byte line
         return pixel_in_line * num_channels + channel
     
+    def get_positions_covered(ram_addr):
+        """Invert get_ram_address: the spatial positions stored at a RAM address"""
+        if ram_addr >= img_width * img_height:
+            return []
+        return [divmod(ram_addr, img_width)]
+    
     # Print detailed memory mapping for first few positions
     cocotb.log.info("\n=== DETAILED MEMORY MAPPING ===")
     for row in range(min(3, img_height)):
@@ -72,13 +55,8 @@ async def test_memory_traverse(dut):
             cocotb.log.info(f"\nPosition ({row},{col}):")
             cocotb.log.info(f"  RAM address: {ram_addr}")
             
-            channels = []
-            byte_offsets = []
-            for ch in range(num_channels):
-                val = get_expected_value(row, col, ch)
-                byte_off = get_byte_offset(row, col, ch)
-                channels.append(val)
-                byte_offsets.append(byte_off)
+            channels = expected[row, col].tolist()
+            byte_offsets = [get_byte_offset(row, col, ch) for ch in range(num_channels)]
             
             cocotb.log.info(f"  Expected channels: {channels}")
             cocotb.log.info(f"  Byte offsets: {byte_offsets}")
@@ -89,64 +67,69 @@ async def test_memory_traverse(dut):
             cocotb.log.info(f"  Channel group 0 (0-3): {ch_group_0}")
             cocotb.log.info(f"  Channel group 1 (4-7): {ch_group_1}")
     
+    # Handles sampled during the RAM trace, resolved once
+    h_ram_re = dut.ram_re
+    h_addr = dut.ram_addr_truncated
+    h_done = dut.buffer_loading_complete
+    h_dout = dut.ram_dout
+    h_d0, h_d1, h_d2, h_d3 = dut.ram_dout0, dut.ram_dout1, dut.ram_dout2, dut.ram_dout3
+    log_reads = cocotb.log.isEnabledFor(logging.INFO)
+    
     # Now let's trace through the actual hardware access
     cocotb.log.info("\n=== HARDWARE ACCESS TRACE ===")
     
     # Start extraction for channel group 0
     cocotb.log.info("\n--- CHANNEL GROUP 0 (channels 0-3) ---")
     dut.start_extraction.value = 1
-    await RisingEdge(dut.clk)
+    await clk_edge
     dut.start_extraction.value = 0
     
-    # Monitor RAM accesses during loading
-    ram_accesses = []
+    # Monitor RAM accesses during loading; the dict keeps each address once, in first-read order
+    ram_accesses = {}
+    reads = 0
     cycle_count = 0
     
-    while not dut.buffer_loading_complete.value and cycle_count < 200:
-        await RisingEdge(dut.clk)
+    while not h_done.value and cycle_count < 200:
+        await clk_edge
         cycle_count += 1
         
-        if dut.ram_re.value:
-            ram_addr = int(dut.ram_addr_truncated.value)
-            ram_accesses.append(ram_addr)
+        if h_ram_re.value:
+            ram_addr = int(h_addr.value)
+            ram_accesses.setdefault(ram_addr, reads)
+            reads += 1
             
             # Wait one cycle for data to be available
-            await RisingEdge(dut.clk)
+            await clk_edge
             cycle_count += 1
             
-            # Read the RAM outputs
-            full_data = int(dut.ram_dout.value)
-            dout0 = int(dut.ram_dout0.value)
-            dout1 = int(dut.ram_dout1.value)
-            dout2 = int(dut.ram_dout2.value)
-            dout3 = int(dut.ram_dout3.value)
+            if not log_reads or LOG_EVERY == 0 or (reads > 4 and reads % LOG_EVERY):
+                continue
+            
+            # Read the RAM outputs once and log them as one record
+            full_data = int(h_dout.value)
+            dout0, dout1, dout2, dout3 = int(h_d0.value), int(h_d1.value), int(h_d2.value), int(h_d3.value)
             
-            cocotb.log.info(f"RAM read at address {ram_addr}:")
-            cocotb.log.info(f"  Full 128-bit: 0x{full_data:032x}")
-            cocotb.log.info(f"  dout0 (bytes 3:0):   0x{dout0:08x} = [{(dout0>>24)&0xFF}, {(dout0>>16)&0xFF}, {(dout0>>8)&0xFF}, {dout0&0xFF}]")
-            cocotb.log.info(f"  dout1 (bytes 7:4):   0x{dout1:08x} = [{(dout1>>24)&0xFF}, {(dout1>>16)&0xFF}, {(dout1>>8)&0xFF}, {dout1&0xFF}]")
-            cocotb.log.info(f"  dout2 (bytes 11:8):  0x{dout2:08x} = [{(dout2>>24)&0xFF}, {(dout2>>16)&0xFF}, {(dout2>>8)&0xFF}, {dout2&0xFF}]")
-            cocotb.log.info(f"  dout3 (bytes 15:12): 0x{dout3:08x} = [{(dout3>>24)&0xFF}, {(dout3>>16)&0xFF}, {(dout3>>8)&0xFF}, {dout3&0xFF}]")
+            cocotb.log.info(f"RAM read at address {ram_addr}:\n"
+                            f"  Full 128-bit: 0x{full_data:032x}\n"
+                            f"  dout0 (bytes 3:0):   0x{dout0:08x} = {list(dout0.to_bytes(4, 'big'))}\n"
+                            f"  dout1 (bytes 7:4):   0x{dout1:08x} = {list(dout1.to_bytes(4, 'big'))}\n"
+                            f"  dout2 (bytes 11:8):  0x{dout2:08x} = {list(dout2.to_bytes(4, 'big'))}\n"
+                            f"  dout3 (bytes 15:12): 0x{dout3:08x} = {list(dout3.to_bytes(4, 'big'))}")
             
             # Determine which spatial positions this address covers
-            positions_covered = []
-            for pos in range(img_width * img_height):
-                if get_ram_address(pos // img_width, pos % img_width) == ram_addr:
-                    positions_covered.append((pos // img_width, pos % img_width))
+            positions_covered = get_positions_covered(ram_addr)
             
             cocotb.log.info(f"  Covers positions: {positions_covered}")
             
             # Show expected data for these positions
             for pos_row, pos_col in positions_covered:
-                expected_channels = []
-                for ch in range(num_channels):
-                    expected_channels.append(get_expected_value(pos_row, pos_col, ch))
+                expected_channels = expected[pos_row, pos_col].tolist()
                 cocotb.log.info(f"    Position ({pos_row},{pos_col}) expected: {expected_channels}")
     
-    await RisingEdge(dut.clk)
+    await clk_edge
     
     cocotb.log.info(f"\nChannel group 0 loading completed after {cycle_count} cycles")
-    cocotb.log.info(f"RAM addresses accessed: {sorted(set(ram_accesses))}")
+    cocotb.log.info(f"RAM addresses accessed: {sorted(ram_accesses)}")
     
     # Check what was loaded into position (0,0)
     patch_00 = int(dut.patch_pe00_out.value)
@@ -157,7 +140,7 @@ async def test_memory_traverse(dut):
     
     cocotb.log.info(f"\nLoaded into position (0,0): [{ch0}, {ch1}, {ch2}, {ch3}]")
     
-    expected_00 = [get_expected_value(0, 0, ch) for ch in range(4)]
+    expected_00 = expected[0, 0, 0:4].tolist()
     cocotb.log.info(f"Expected for position (0,0): {expected_00}")
     
     if [ch0, ch1, ch2, ch3] == expected_00:
@@ -168,28 +151,30 @@ async def test_memory_traverse(dut):
     # Now test channel group 1
     cocotb.log.info("\n--- CHANNEL GROUP 1 (channels 4-7) ---")
     dut.next_channel_group.value = 1
-    await RisingEdge(dut.clk)
+    await clk_edge
     dut.next_channel_group.value = 0
     
     # Monitor RAM accesses for channel group 1
-    ram_accesses_ch1 = []
+    ram_accesses_ch1 = {}
+    reads_ch1 = 0
     cycle_count = 0
     
-    while not dut.buffer_loading_complete.value and cycle_count < 200:
-        await RisingEdge(dut.clk)
+    while not h_done.value and cycle_count < 200:
+        await clk_edge
         cycle_count += 1
         
-        if dut.ram_re.value:
-            ram_addr = int(dut.ram_addr_truncated.value)
-            ram_accesses_ch1.append(ram_addr)
+        if h_ram_re.value:
+            ram_addr = int(h_addr.value)
+            ram_accesses_ch1.setdefault(ram_addr, reads_ch1)
+            reads_ch1 += 1
             
-            if len(ram_accesses_ch1) <= 3:  # Only log first few accesses to avoid spam
+            if reads_ch1 <= 3:  # Only log first few accesses to avoid spam
                 cocotb.log.info(f"Channel group 1 - RAM read at address {ram_addr}")
     
-    await RisingEdge(dut.clk)
+    await clk_edge
     
     cocotb.log.info(f"\nChannel group 1 loading completed after {cycle_count} cycles")
-    cocotb.log.info(f"RAM addresses accessed: {sorted(set(ram_accesses_ch1))}")
+    cocotb.log.info(f"RAM addresses accessed: {sorted(ram_accesses_ch1)}")
     
     # Check what was loaded into position (0,0) for channel group 1
     patch_00_ch1 = int(dut.patch_pe00_out.value)
@@ -200,7 +185,7 @@ async def test_memory_traverse(dut):
     
     cocotb.log.info(f"\nLoaded into position (0,0): [{ch4}, {ch5}, {ch6}, {ch7}]")
     
-    expected_00_ch1 = [get_expected_value(0, 0, ch) for ch in range(4, 8)]
+    expected_00_ch1 = expected[0, 0, 4:8].tolist()
     cocotb.log.info(f"Expected for position (0,0): {expected_00_ch1}")
     
     if [ch4, ch5, ch6, ch7] == expected_00_ch1:
@@ -218,7 +203,7 @@ async def test_memory_traverse(dut):
     ch01_2 = (patch_01 >> 16) & 0xFF
     ch01_3 = (patch_01 >> 24) & 0xFF
     
-    expected_01_ch1 = [get_expected_value(0, 1, ch) for ch in range(4, 8)]
+    expected_01_ch1 = expected[0, 1, 4:8].tolist()
     cocotb.log.info(f"Position (0,1) loaded: [{ch01_0}, {ch01_1}, {ch01_2}, {ch01_3}]")
     cocotb.log.info(f"Position (0,1) expected: {expected_01_ch1}")
     
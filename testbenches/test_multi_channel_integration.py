@@ -1,42 +1,23 @@
 import cocotb
-from cocotb.clock import Clock
-from cocotb.triggers import RisingEdge, Timer
+from cocotb.triggers import RisingEdge, ClockCycles, First, Timer
 from cocotb.binary import BinaryValue
 import numpy as np
+from tb_common import init_dut
+
+async def wait_for_buffer_loaded(dut, timeout_cycles=200):
+    """Sleep until buffer_loading_complete rises or timeout_cycles clocks pass; returns whether loading completed"""
+    done = dut.buffer_loading_complete
+    if not done.value:
+        await First(RisingEdge(done), ClockCycles(dut.clk, timeout_cycles))
+    return bool(done.value)
 
 @cocotb.test()
 async def test_multi_channel_16x16x8_integration(dut):
     """Test complete multi-channel data flow through tensor RAM -> unified buffer -> spatial formatter
     Tests 16x16x8 data with 2 channel groups (0-3, 4-7)"""
     
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
-    
-    # Reset
-    dut.reset.value = 1
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
-    
-    # Configure for 16x16x8 image (8 channels)
-    dut.img_width.value = 16
-    dut.img_height.value = 16
-    dut.num_channels.value = 8
-    dut.pad_top.value = 0
-    dut.pad_bottom.value = 0
-    dut.pad_left.value = 0
-    dut.pad_right.value = 0
-    
-    # Initialize control signals
-    dut.start_extraction.value = 0
-    dut.next_channel_group.value = 0
-    dut.next_spatial_block.value = 0
-    dut.start_formatting.value = 0
-    dut.tensor_ram_we.value = 0
-    
-    await RisingEdge(dut.clk)
+    # Clock, reset and 16x16x8 image configuration
+    clk_edge = await init_dut(dut, img_w=16, img_h=16, channels=8)
     
     # Use the existing hex file data (16x16x8)
     cocotb.log.info("Using 16x16x8 tensor RAM data from hex file...")
@@ -45,7 +26,7 @@ async def test_multi_channel_16x16x8_integration(dut):
     cocotb.log.info("Starting extraction for channel group 0 (channels 0-3)...")
     
     dut.start_extraction.value = 1
-    await RisingEdge(dut.clk)
+    await clk_edge
     dut.start_extraction.value = 0
     
     # Wait for buffer loading to complete
@@ -53,7 +34,7 @@ async def test_multi_channel_16x16x8_integration(dut):
     timeout_cycles = 200
     
     while not dut.buffer_loading_complete.value and cycle_count < timeout_cycles:
-        await RisingEdge(dut.clk)
+        await clk_edge
         cycle_count += 1
         if cycle_count % 20 == 0:
             cocotb.log.info(f"Waiting for channel group 0 loading... cycle {cycle_count}")
@@ -65,7 +46,7 @@ async def test_multi_channel_16x16x8_integration(dut):
     cocotb.log.info(f"Channel group 0 loaded after {cycle_count} cycles")
     
     # Wait one more cycle for state transition
-    await RisingEdge(dut.clk)
+    await clk_edge
     
     # Verify first channel group data
     assert dut.block_ready.value == 1, "Block should be ready after loading"
@@ -99,19 +80,25 @@ async def test_multi_channel_16x16x8_integration(dut):
     cocotb.log.info("Testing spatial formatter for channel group 0...")
     
     dut.start_formatting.value = 1
-    await RisingEdge(dut.clk)
+    await clk_edge
     dut.start_formatting.value = 0
     
     # Monitor a few cycles of formatted output
     formatted_cycles = 0
     max_format_cycles = 10
     
+    # Resolve the handles and how to decode them once, not on every formatted cycle
+    formatted_valid = dut.formatted_data_valid
+    formatted_a0_0 = dut.formatted_A0_0
+    formatted_a0_1 = dut.formatted_A0_1
+    decode = (lambda v: v.signed_integer) if hasattr(formatted_a0_0.value, 'signed_integer') else int
+    
     while formatted_cycles < max_format_cycles:
-        await RisingEdge(dut.clk)
+        await clk_edge
         
-        if dut.formatted_data_valid.value:
-            a0_0 = int(dut.formatted_A0_0.value.signed_integer) if hasattr(dut.formatted_A0_0.value, 'signed_integer') else int(dut.formatted_A0_0.value)
-            a0_1 = int(dut.formatted_A0_1.value.signed_integer) if hasattr(dut.formatted_A0_1.value, 'signed_integer') else int(dut.formatted_A0_1.value)
+        if formatted_valid.value:
+            a0_0 = decode(formatted_a0_0.value)
+            a0_1 = decode(formatted_a0_1.value)
             
             cocotb.log.info(f"Formatted cycle {formatted_cycles}: A0[0]={a0_0}, A0[1]={a0_1}")
             
@@ -130,11 +117,11 @@ async def test_multi_channel_16x16x8_integration(dut):
     cocotb.log.info("Testing channel group advancement...")
     
     dut.next_channel_group.value = 1
-    await RisingEdge(dut.clk)
+    await clk_edge
     dut.next_channel_group.value = 0
     
     # Check if we need to advance to next channel group
-    await RisingEdge(dut.clk)
+    await clk_edge
     
     if not dut.all_channels_done.value:
         cocotb.log.info("Moving to channel group 1 (channels 4-7)...")
@@ -142,7 +129,7 @@ async def test_multi_channel_16x16x8_integration(dut):
         # Wait for next channel group to load
         cycle_count = 0
         while not dut.buffer_loading_complete.value and cycle_count < timeout_cycles:
-            await RisingEdge(dut.clk)
+            await clk_edge
             cycle_count += 1
             if cycle_count % 20 == 0:
                 cocotb.log.info(f"Waiting for channel group 1 loading... cycle {cycle_count}")
@@ -154,7 +141,7 @@ async def test_multi_channel_16x16x8_integration(dut):
         cocotb.log.info(f"Channel group 1 loaded after {cycle_count} cycles")
         
         # Wait one more cycle for state transition
-        await RisingEdge(dut.clk)
+        await clk_edge
         
         # Verify second channel group data
         patch_00_ch1 = int(dut.patch_pe00_out.value)
@@ -182,9 +169,9 @@ async def test_multi_channel_16x16x8_integration(dut):
         
         # Test next channel group again to complete all channels
         dut.next_channel_group.value = 1
-        await RisingEdge(dut.clk)
+        await clk_edge
         dut.next_channel_group.value = 0
-        await RisingEdge(dut.clk)
+        await clk_edge
         
         if dut.all_channels_done.value:
             cocotb.log.info("✓ All 8 channels processed successfully!")
@@ -200,17 +187,12 @@ async def test_multi_channel_16x16x8_integration(dut):
     cocotb.log.info("Testing spatial block advancement...")
     
     dut.next_spatial_block.value = 1
-    await RisingEdge(dut.clk)
+    await clk_edge
     dut.next_spatial_block.value = 0
     
     # Wait for next spatial block to load (should start with channel group 0 again)
-    cycle_count = 0
-    while not dut.buffer_loading_complete.value and cycle_count < timeout_cycles:
-        await RisingEdge(dut.clk)
-        cycle_count += 1
-    
-    if cycle_count < timeout_cycles:
-        await RisingEdge(dut.clk)  # Wait for state transition
+    if await wait_for_buffer_loaded(dut, timeout_cycles):
+        await clk_edge  # Wait for state transition
         
         # Verify we got different spatial data
         new_patch_00 = int(dut.patch_pe00_out.value)
@@ -227,47 +209,18 @@ async def test_multi_channel_16x16x8_integration(dut):
 async def test_channel_group_counting(dut):
     """Test that the system correctly calculates and processes the right number of channel groups"""
     
-    # Start clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
-    
-    # Reset
-    dut.reset.value = 1
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
-    
-    # Configure for 16x16x8 image
-    dut.img_width.value = 16
-    dut.img_height.value = 16
-    dut.num_channels.value = 8
-    dut.pad_top.value = 0
-    dut.pad_bottom.value = 0
-    dut.pad_left.value = 0
-    dut.pad_right.value = 0
-    
-    # Initialize control signals
-    dut.start_extraction.value = 0
-    dut.next_channel_group.value = 0
-    dut.next_spatial_block.value = 0
-    dut.start_formatting.value = 0
-    dut.tensor_ram_we.value = 0
-    
-    await RisingEdge(dut.clk)
+    # Clock, reset and 16x16x8 image configuration
+    clk_edge = await init_dut(dut, img_w=16, img_h=16, channels=8)
     
     # Start extraction
     dut.start_extraction.value = 1
-    await RisingEdge(dut.clk)
+    await clk_edge
     dut.start_extraction.value = 0
     
     # Wait for loading to complete
-    cycle_count = 0
-    while not dut.buffer_loading_complete.value and cycle_count < 200:
-        await RisingEdge(dut.clk)
-        cycle_count += 1
+    await wait_for_buffer_loaded(dut)
     
-    await RisingEdge(dut.clk)
+    await clk_edge
     
     # Check internal channel group tracking
     ub = dut.unified_buffer_inst
@@ -289,9 +242,9 @@ async def test_channel_group_counting(dut):
         
         # Advance to next channel group
         dut.next_channel_group.value = 1
-        await RisingEdge(dut.clk)
+        await clk_edge
         dut.next_channel_group.value = 0
-        await RisingEdge(dut.clk)
+        await clk_edge
         
         channel_groups_processed += 1
         
@@ -300,11 +253,8 @@ async def test_channel_group_counting(dut):
             assert not dut.all_channels_done.value, f"Should not be done after {channel_groups_processed} groups"
             
             # Wait for next group to load
-            cycle_count = 0
-            while not dut.buffer_loading_complete.value and cycle_count < 200:
-                await RisingEdge(dut.clk)
-                cycle_count += 1
-            await RisingEdge(dut.clk)
+            await wait_for_buffer_loaded(dut)
+            await clk_edge
         else:
             # Should be done now
             assert dut.all_channels_done.value, f"Should be done after processing all {total_channel_groups} groups"
@@ -5,20 +5,11 @@ from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, FallingEdge, Timer
 from cocotb.result import TestFailure
 import struct
+import numpy as np
 
-def convert_to_signed(val, bits):
-    """Convert unsigned value to signed"""
-    if val & (1 << (bits-1)):
-        return val - (1 << bits)
-    return val
-
-def extract_pixels_from_word(word_val):
-    """Extract 4 pixels from a 32-bit word (MSB to LSB)"""
-    pixels = []
-    for i in range(4):
-        pixel = (word_val >> (24 - i*8)) & 0xFF
-        pixels.append(convert_to_signed(pixel, 8))
-    return pixels
+def extract_patch_pixels(words):
+    """Extract the 4x4 signed pixels of a patch from its A0..A3 words, one row per word (MSB to LSB)"""
+    return np.array(words, dtype='>u4').view(np.int8).reshape(len(words), 4).tolist()
 
 @cocotb.test()
 async def test_patch_extractor_direct(dut):
@@ -70,12 +61,6 @@ async def test_patch_extractor_direct(dut):
             col = int(dut.u_patch_extractor.current_patch_col.value)
             channel = int(dut.u_patch_extractor.current_channel.value)
             
-            # Get patch extractor outputs directly
-            patch_A0 = int(dut.u_patch_extractor.patch_A0_out.value)
-            patch_A1 = int(dut.u_patch_extractor.patch_A1_out.value) 
-            patch_A2 = int(dut.u_patch_extractor.patch_A2_out.value)
-            patch_A3 = int(dut.u_patch_extractor.patch_A3_out.value)
-            
             # Show detailed output for specific positions
             show_details = False
             
@@ -91,10 +76,13 @@ async def test_patch_extractor_direct(dut):
             if show_details:
                 print(f"\n--- PATCH {patch_count} (Position: {row}, {col}, Channel: {channel}) ---")
                 
-                A0_pixels = extract_pixels_from_word(patch_A0)
-                A1_pixels = extract_pixels_from_word(patch_A1)
-                A2_pixels = extract_pixels_from_word(patch_A2)
-                A3_pixels = extract_pixels_from_word(patch_A3)
+                # Get patch extractor outputs directly
+                patch_A0 = int(dut.u_patch_extractor.patch_A0_out.value)
+                patch_A1 = int(dut.u_patch_extractor.patch_A1_out.value) 
+                patch_A2 = int(dut.u_patch_extractor.patch_A2_out.value)
+                patch_A3 = int(dut.u_patch_extractor.patch_A3_out.value)
+                
+                A0_pixels, A1_pixels, A2_pixels, A3_pixels = extract_patch_pixels([patch_A0, patch_A1, patch_A2, patch_A3])
                 
                 print(f"A0 (img row {row-1}): {A0_pixels}")
                 print(f"A1 (img row {row+0}): {A1_pixels}")
@@ -1,5 +1,4 @@
-import cocotb, logging
-cocotb.log.setLevel(logging.DEBUG)
+import cocotb
 from cocotb.triggers import RisingEdge
 from cocotb.clock import Clock
 import random
@@ -8,7 +7,6 @@ import random
 async def test_tensor_process_elem(dut):
     """Tensor processing element test with random and edge cases"""
     CLOCK_PERIOD = 2
-    dut._log.setLevel(logging.DEBUG)
     # Start clock
     cocotb.start_soon(Clock(dut.clk, CLOCK_PERIOD, units="ns").start())
 
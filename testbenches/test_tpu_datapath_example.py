@@ -1,16 +1,11 @@
 import cocotb
-import logging
 from cocotb.triggers import RisingEdge
 from cocotb.clock import Clock
 
-# Set up logging
-cocotb.log.setLevel(logging.DEBUG)
-
 @cocotb.test()
 async def test_tpu_datapath_example_32x32x1(dut):
     """Test the tpu_datapath_example with 32x32x1 input tensor"""
     CLOCK_PERIOD = 2
-    dut._log.setLevel(logging.DEBUG)
     
     # Start clock
     cocotb.start_soon(Clock(dut.clk, CLOCK_PERIOD, units="ns").start())
@@ -324,7 +319,6 @@ async def test_tpu_datapath_example_32x32x1(dut):
 async def test_tpu_datapath_example_multi_channel(dut):
     """Test the tpu_datapath_example with multi-channel configuration"""
     CLOCK_PERIOD = 2
-    dut._log.setLevel(logging.DEBUG)
     
     # Start clock
     cocotb.start_soon(Clock(dut.clk, CLOCK_PERIOD, units="ns").start())